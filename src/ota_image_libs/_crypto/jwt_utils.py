@@ -17,15 +17,21 @@ from __future__ import annotations
 from typing import Any
 
 import jwt
+from cryptography.hazmat.primitives.asymmetric.types import PrivateKeyTypes
 
 
 def compose_jwt(
     payload: dict[str, Any],
     headers: dict[str, Any] | None = None,
     *,
-    priv_key: bytes,
+    priv_key: bytes | PrivateKeyTypes,
     alg: str,
 ) -> str:
+    """Compose and sign a JWT.
+
+    <priv_key> can be either a PEM-encoded private key, or an already loaded
+        private key object, which will be used directly without parsing again.
+    """
     return jwt.encode(
         payload=payload,
         headers=headers,
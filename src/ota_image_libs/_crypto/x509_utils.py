@@ -27,6 +27,7 @@ from cryptography.x509 import (
     Name,
     load_der_x509_certificate,
     load_pem_x509_certificate,
+    load_pem_x509_certificates,
 )
 from cryptography.x509.verification import (
     Criticality,
@@ -100,6 +101,11 @@ class CACertStore(Dict[Name, Certificate]):
         cert = load_pem_x509_certificate(_input)
         self.add_cert(cert)
 
+    def add_raw_certs(self, _input: bytes) -> None:
+        """Load all the certs from concatenated PEM certs in one pass."""
+        for cert in load_pem_x509_certificates(_input):
+            self.add_cert(cert)
+
     def internal_check(self) -> None:
         """Do an internal check to see if this CACertStore is valid.
 
@@ -15,7 +15,11 @@
 from __future__ import annotations
 
 import os
+import sqlite3
 from pathlib import Path
+from typing import Any, Generator
+
+from simple_sqlite3_orm.utils import enable_mmap, enable_tmp_store_at_memory
 
 
 def count_blobs_in_dir(resource_dir: Path) -> tuple[int, int]:
@@ -24,3 +28,33 @@ def count_blobs_in_dir(resource_dir: Path) -> tuple[int, int]:
     for _count, entry in enumerate(os.scandir(resource_dir), start=1):
         _size += entry.stat().st_size
     return _count, _size
+
+
+ITER_FETCH_BATCH_SIZE = 10_000
+QUERY_ONLY_MMAP_SIZE = 1024**3  # 1GiB
+QUERY_ONLY_CACHE_SIZE_KIB = 256 * 1024  # 256MiB
+
+
+def enable_query_only(
+    con: sqlite3.Connection, *, mmap_size: int = QUERY_ONLY_MMAP_SIZE
+) -> None:
+    """Tune the connection for read-only bulk scanning.
+
+    The connection will be set as query_only, with temp store in memory,
+    larger page cache and mmap enabled.
+    """
+    enable_tmp_store_at_memory(con)
+    if mmap_size > 0:
+        enable_mmap(con, mmap_size)
+    with con as _con:
+        _con.execute(f"PRAGMA cache_size = -{QUERY_ONLY_CACHE_SIZE_KIB};")
+        _con.execute("PRAGMA query_only = ON;")
+
+
+def iter_cursor_in_batch(
+    cur: sqlite3.Cursor, *, batch_size: int = ITER_FETCH_BATCH_SIZE
+) -> Generator[Any]:
+    """Iterate through the result rows of <cur>, fetching <batch_size> rows at once."""
+    cur.arraysize = batch_size
+    while _rows := cur.fetchmany():
+        yield from _rows
@@ -15,14 +15,34 @@
 
 from __future__ import annotations
 
+import errno
 import hashlib
 import io
+import os
 import shutil
 import sys
 from functools import partial
 from pathlib import Path
 
 DEFAULT_FILE_CHUNK_SIZE = 1024**2  # 1MiB
+# NOTE: the max bytes can be transferred by one sendfile/copy_file_range call on Linux.
+MAX_FD_COPY_COUNT = 0x7FFFF000
+# NOTE: some filesystems(i.e., procfs/sysfs, some FUSE/overlay setups) might return 0
+#       from copy_file_range/sendfile without copying anything. Like `shutil` of
+#       python3.14, 0 is taken as EOF only after some data is copied by the method,
+#       otherwise the next method is tried.
+# NOTE: on these errors, the copy method is not supported between the two fds,
+#       i.e., cross filesystem, or not supported by the kernel/filesystem.
+#       EBADF is NOT included, the fds must not be opened with O_APPEND.
+_FD_COPY_FALLBACK_ERRNOS = frozenset(
+    (
+        errno.EXDEV,
+        errno.ENOSYS,
+        errno.EINVAL,
+        errno.EOPNOTSUPP,
+        errno.ENOTSUP,
+    )
+)
 
 
 if sys.version_info >= (3, 11):
@@ -80,3 +100,122 @@ def remove_file(_fpath: Path, *, ignore_error: bool = True) -> None:
     except Exception:
         if not ignore_error:
             raise
+
+
+def _copy_file_range_step(src_fd: int, dst_fd: int) -> int:
+    return os.copy_file_range(src_fd, dst_fd, MAX_FD_COPY_COUNT)
+
+
+def _sendfile_step(src_fd: int, dst_fd: int) -> int:
+    return os.sendfile(dst_fd, src_fd, None, MAX_FD_COPY_COUNT)
+
+
+_FD_COPY_STEPS = (
+    (_copy_file_range_step, _sendfile_step)
+    if hasattr(os, "copy_file_range")
+    else (_sendfile_step,)
+)
+
+
+def copy_fd(
+    src_fd: int,
+    dst_fd: int,
+    *,
+    chunk_size: int = DEFAULT_FILE_CHUNK_SIZE,
+    buffer: memoryview | None = None,
+) -> int:
+    """Copy all the remaining contents from <src_fd> to <dst_fd>.
+
+    The copy starts at the current offsets of both fds. copy_file_range is tried
+        first, then sendfile, and finally plain read/write as fallback.
+    If <buffer> is given, the read/write fallback reads into it instead of
+        allocating new bytes for each read, <chunk_size> is ignored in this case.
+
+    Returns:
+        The number of bytes copied.
+    """
+    _copied = 0
+    for _step in _FD_COPY_STEPS:
+        try:
+            while (_n := _step(src_fd, dst_fd)) > 0:
+                _copied += _n
+        except OSError as e:
+            # NOTE: the fds' offsets are maintained by kernel, so we can
+            #       safely continue the copy with the next method.
+            if e.errno not in _FD_COPY_FALLBACK_ERRNOS:
+                raise
+            continue
+        if _copied:
+            return _copied
+
+    if buffer is not None:
+        while _read := os.readv(src_fd, [buffer]):
+            _written = 0
+            while _written < _read:
+                _written += os.write(dst_fd, buffer[_written:_read])
+            _copied += _read
+        return _copied
+
+    while _data := os.read(src_fd, chunk_size):
+        _view = memoryview(_data)
+        while _view:
+            _view = _view[os.write(dst_fd, _view) :]
+        _copied += len(_data)
+    return _copied
+
+
+def _copy_file_range_region_step(
+    src_fd: int, dst_fd: int, offset: int, count: int
+) -> int:
+    return os.copy_file_range(src_fd, dst_fd, min(count, MAX_FD_COPY_COUNT), offset)
+
+
+def _sendfile_region_step(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.sendfile(dst_fd, src_fd, offset, min(count, MAX_FD_COPY_COUNT))
+
+
+_FD_REGION_COPY_STEPS = (
+    (_copy_file_range_region_step, _sendfile_region_step)
+    if hasattr(os, "copy_file_range")
+    else (_sendfile_region_step,)
+)
+
+
+def copy_fd_region(
+    src_fd: int,
+    dst_fd: int,
+    *,
+    offset: int,
+    size: int,
+    chunk_size: int = DEFAULT_FILE_CHUNK_SIZE,
+) -> int:
+    """Copy <size> bytes starting at <offset> of <src_fd> to <dst_fd>.
+
+    Unlike `copy_fd`, the offset of <src_fd> is NOT used nor changed, so <src_fd>
+        can be shared with others. The copy to <dst_fd> starts at its current offset.
+
+    Returns:
+        The number of bytes copied, less than <size> if EOF of <src_fd> is reached.
+    """
+    _copied = 0
+    for _step in _FD_REGION_COPY_STEPS:
+        try:
+            while _copied < size and (
+                _n := _step(src_fd, dst_fd, offset + _copied, size - _copied)
+            ):
+                _copied += _n
+        except OSError as e:
+            if e.errno not in _FD_COPY_FALLBACK_ERRNOS:
+                raise
+            continue
+        if _copied or not size:
+            return _copied
+
+    while _copied < size and (
+        _data := os.pread(src_fd, min(chunk_size, size - _copied), offset + _copied)
+    ):
+        _view = memoryview(_data)
+        while _view:
+            _view = _view[os.write(dst_fd, _view) :]
+        _copied += len(_data)
+    return _copied
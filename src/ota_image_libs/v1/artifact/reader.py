@@ -15,10 +15,13 @@
 
 from __future__ import annotations
 
+import mmap
+import os
+import struct
 from os import PathLike, path
 from pathlib import Path
 from typing import IO, Generator
-from zipfile import ZIP_STORED, ZipFile
+from zipfile import ZIP_STORED, ZipFile, ZipInfo
 
 from ota_image_libs.v1.consts import (
     IMAGE_INDEX_FNAME,
@@ -32,6 +35,12 @@ from ota_image_libs.v1.image_manifest.schema import ImageIdentifier, ImageManife
 
 DEFAULT_READ_SIZE = 8 * 1024**2
 
+# see https://pkware.cachefly.net/webdocs/casestudies/APPNOTE.TXT, 4.3.7
+_ZIP_LOCAL_HEADER_MAGIC = b"PK\x03\x04"
+_ZIP_LOCAL_HEADER_SIZE = 30
+_ZIP_LOCAL_HEADER_NAME_LEN_OFFSET = 26
+_ZIP_FLAG_ENCRYPTED = 0x1
+
 
 class OTAImageArtifactReader:
     """Helper class for reading the OTA image artifact file.
@@ -53,6 +62,8 @@ class OTAImageArtifactReader:
             self._f = ZipFile(_f, mode="r", compression=ZIP_STORED)
 
         self._close_on_exit = close_on_exit
+        self._mmap: mmap.mmap | None = None
+        self._mmap_failed = False
         self._chunk_size = read_chunk_size
         self._resource_dir = RESOURCE_DIR
 
@@ -65,6 +76,12 @@ class OTAImageArtifactReader:
         return False
 
     def close(self) -> None:
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # still referred by views, will be unmapped when views are released
+            self._mmap = None
         self._f.close()
 
     def is_valid_image(self) -> bool:
@@ -90,6 +107,14 @@ class OTAImageArtifactReader:
         except KeyError:
             return  # this image is not signed
 
+    def has_blob(self, sha256_digest: str) -> bool:
+        """Check whether a blob presents in the blob storage of the archive."""
+        try:
+            self._f.getinfo(path.join(self._resource_dir, sha256_digest))
+            return True
+        except KeyError:
+            return False
+
     def open_blob(self, sha256_digest: str) -> IO[bytes]:
         """Open a blob in the blob storage of the archive."""
         try:
@@ -99,6 +124,105 @@ class OTAImageArtifactReader:
                 f"blob with {sha256_digest=} not found in the artifact!"
             ) from None
 
+    def get_blob_info(self, sha256_digest: str) -> ZipInfo:
+        """Get the ZipInfo of a blob in the blob storage of the archive."""
+        try:
+            return self._f.getinfo(path.join(self._resource_dir, sha256_digest))
+        except KeyError:
+            raise FileNotFoundError(
+                f"blob with {sha256_digest=} not found in the artifact!"
+            ) from None
+
+    def iter_blobs_info(self) -> Generator[tuple[bytes, ZipInfo]]:
+        """Iterate through all the blobs in the blob storage of the archive.
+
+        Yields:
+            A tuple of the blob's raw sha256 digest and its ZipInfo.
+        """
+        _prefix = f"{self._resource_dir}/"
+        _prefix_len = len(_prefix)
+        for _zinfo in self._f.infolist():
+            _fname = _zinfo.filename
+            if not _fname.startswith(_prefix) or _zinfo.is_dir():
+                continue
+            try:
+                yield bytes.fromhex(_fname[_prefix_len:]), _zinfo
+            except ValueError:
+                continue  # not a blob
+
+    def open_blob_by_info(self, zinfo: ZipInfo) -> IO[bytes]:
+        """Open a blob with its ZipInfo, skipping the lookup by name."""
+        return self._f.open(zinfo)
+
+    def open_blob_region(self, sha256_digest: str) -> tuple[int, int, int] | None:
+        """Locate the raw data region of a blob in the archive file.
+
+        See `open_blob_region_by_info` for more details.
+
+        Raises:
+            FileNotFoundError if the blob is not found in the archive.
+        """
+        return self.open_blob_region_by_info(self.get_blob_info(sha256_digest))
+
+    def open_blob_region_by_info(self, zinfo: ZipInfo) -> tuple[int, int, int] | None:
+        """Locate the raw data region of a blob in the archive file by its ZipInfo.
+
+        NOTE that the returned fd is owned by this reader, the caller should use
+            offset-based operations(pread, copy_file_range, etc.) on it, and SHOULD
+            NOT use it after the reader is closed.
+
+        Returns:
+            A tuple of (fd, offset, size) of the blob's data in the archive file, or None
+                if the blob cannot be read directly, i.e., the blob is compressed or
+                encrypted, or the archive is not backed by a real file.
+        """
+        if zinfo.compress_type != ZIP_STORED or zinfo.flag_bits & _ZIP_FLAG_ENCRYPTED:
+            return None
+        try:
+            _fd = self._f.fp.fileno()  # type: ignore[union-attr]
+        except (AttributeError, OSError):
+            return None
+
+        _header_offset = zinfo.header_offset
+        _header = os.pread(_fd, _ZIP_LOCAL_HEADER_SIZE, _header_offset)
+        if (
+            len(_header) != _ZIP_LOCAL_HEADER_SIZE
+            or _header[:4] != _ZIP_LOCAL_HEADER_MAGIC
+        ):
+            return None
+        _fname_len, _extra_len = struct.unpack_from(
+            "<HH", _header, _ZIP_LOCAL_HEADER_NAME_LEN_OFFSET
+        )
+        _data_offset = _header_offset + _ZIP_LOCAL_HEADER_SIZE + _fname_len + _extra_len
+        return _fd, _data_offset, zinfo.file_size
+
+    def blob_view_by_info(self, zinfo: ZipInfo) -> memoryview | None:
+        """Get a zero-copy view of a blob's data from the memory-mapped archive file.
+
+        NOTE that the caller SHOULD release the view before the reader is closed.
+        NOTE that the whole archive file is mapped by each reader instance at first call.
+            The mapping only takes virtual address space, the pages are backed by
+            the page cache of the archive file and shared between the readers.
+
+        Returns:
+            A read-only memoryview of the blob's data, or None if the blob cannot
+                be read directly, see `open_blob_region_by_info` for more details,
+                or the archive file cannot be memory-mapped.
+        """
+        if self._mmap_failed or not (_region := self.open_blob_region_by_info(zinfo)):
+            return None
+        _fd, _offset, _size = _region
+        if self._mmap is None:
+            try:
+                self._mmap = mmap.mmap(_fd, 0, prot=mmap.PROT_READ)
+            except (OSError, ValueError):
+                # NOTE: i.e., not enough address space for mapping a large archive,
+                #       the caller should fallback to read the blob by streaming.
+                self._mmap_failed = True
+                return None
+        with memoryview(self._mmap) as _view:
+            return _view[_offset : _offset + _size]
+
     def read_blob(self, sha256_digest: str) -> bytes:
         with self.open_blob(sha256_digest) as _blob_reader:
             return _blob_reader.read()
@@ -40,6 +40,7 @@ from simple_sqlite3_orm.utils import (
 )
 from typing_extensions import Annotated
 
+from ota_image_libs.common.db_utils import enable_query_only, iter_cursor_in_batch
 from ota_image_libs.common.model_spec import MsgPackedDict, StrOrPath
 from ota_image_libs.v1.media_types import OTA_IMAGE_FILETABLE
 
@@ -236,6 +237,30 @@ class DirRow(TableSpec):
     xattrs: Annotated[Optional[MsgPackedDict], TypeAffinityRepr(bytes)] = None
 
 
+# NOTE: the cols selected by iter_regular_entries, in order
+_REGULAR_ENTRY_COLS = (
+    "path",
+    "uid",
+    "gid",
+    "mode",
+    "links_count",
+    "xattrs",
+    "digest",
+    "size",
+    "contents",
+    "inode_id",
+)
+
+
+def _regular_file_row_factory(_cursor: sqlite3.Cursor, _row: tuple) -> RegularFileRow:
+    """Row factory for iter_regular_entries.
+
+    As the selected cols are known and fixed, skip resolving the cols from the
+        cursor description for each row like table_row_factory2 does.
+    """
+    return RegularFileRow.model_validate(dict(zip(_REGULAR_ENTRY_COLS, _row)))
+
+
 DB_TIMEOUT = 16  # seconds
 MAX_ENTRIES_PER_DIGEST = 16
 EMPTY_FILE_SHA256 = r"e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
@@ -258,15 +283,29 @@ class FileTableDBHelper:
         self.db_f = db_f
 
     def connect_fstable_db(
-        self, *, enable_wal: bool = False, enable_mmap_size: int | None = None
+        self,
+        *,
+        enable_wal: bool = False,
+        enable_mmap_size: int | None = None,
+        query_only: bool = False,
     ) -> sqlite3.Connection:
         _conn = sqlite3.connect(self.db_f, check_same_thread=False, timeout=DB_TIMEOUT)
         if enable_wal:
             enable_wal_mode(_conn)
-        if enable_mmap_size and enable_mmap_size > 0:
+        if query_only:
+            enable_query_only(_conn)
+        elif enable_mmap_size and enable_mmap_size > 0:
             enable_mmap(_conn, enable_mmap_size)
         return _conn
 
+    def _iter_query(
+        self, stmt: str, row_factory: Callable[..., typing.Any] | None = None
+    ) -> Generator[typing.Any]:
+        """Execute <stmt> with a query_only connection, fetch result rows in batch."""
+        with closing(self.connect_fstable_db(query_only=True)) as _conn:
+            _conn.row_factory = row_factory
+            yield from iter_cursor_in_batch(_conn.execute(stmt))
+
     def bootstrap_db(self, *, enable_wal: bool = False) -> None:
         # NOTE: once the db is created with wal enabled, the setting will be persist.
         with closing(self.connect_fstable_db(enable_wal=enable_wal)) as fst_conn:
@@ -289,53 +328,51 @@ class FileTableDBHelper:
         if exclude_inlined:
             stmt = f"SELECT digest,size FROM {FT_RESOURCE_TABLE_NAME} WHERE contents IS NULL AND size!=0"
 
-        with FileTableDirORM(self.connect_fstable_db()) as orm:
-            yield from orm.orm_select_entries(
-                _row_factory=typing.cast(
-                    "Callable[..., tuple[bytes, int]]", sqlite3.Row
-                ),
-                _stmt=stmt,
-            )
+        yield from self._iter_query(stmt)
 
     def iter_dir_entries(self) -> Generator[DirRow]:
-        with FileTableDirORM(self.connect_fstable_db()) as orm:
-            # fmt: off
-            yield from orm.orm_select_entries(
-                _row_factory=DirRow.table_row_factory2,
-                _stmt = gen_sql_stmt(
-                    "SELECT", "path,uid,gid,mode,xattrs",
-                    "FROM", FT_DIR_TABLE_NAME,
-                    "JOIN", FT_INODE_TABLE_NAME, "USING(inode_id)",
-                )
-            )
-            # fmt: on
+        # fmt: off
+        yield from self._iter_query(
+            gen_sql_stmt(
+                "SELECT", "path,uid,gid,mode,xattrs",
+                "FROM", FT_DIR_TABLE_NAME,
+                "JOIN", FT_INODE_TABLE_NAME, "USING(inode_id)",
+            ),
+            DirRow.table_row_factory2,
+        )
+        # fmt: on
 
     def iter_regular_entries(self) -> Generator[RegularFileRow]:
-        with FileTableRegularORM(self.connect_fstable_db()) as orm:
-            # fmt: off
-            yield from orm.orm_select_entries(
-                    _stmt=gen_sql_stmt(
-                    "SELECT", "path,uid,gid,mode,links_count,xattrs,digest,size,contents,inode_id",
-                    "FROM", FT_REGULAR_TABLE_NAME,
-                    "JOIN", FT_INODE_TABLE_NAME, "USING(inode_id)",
-                    "JOIN", FT_RESOURCE_TABLE_NAME, "USING(resource_id)",
-                ),
-                _row_factory=RegularFileRow.table_row_factory2,
-            )
-            # fmt: on
+        """Iterate through all the regular files, grouped by their resource.
+
+        NOTE: entries are ordered by resource_id, which is 1:1 mapped to digest,
+            so that entries of the same digest are yielded consecutively. The
+            ordering is served by the fr_resource_id_index without extra sorting.
+        """
+        # fmt: off
+        yield from self._iter_query(
+            gen_sql_stmt(
+                "SELECT", ",".join(_REGULAR_ENTRY_COLS),
+                "FROM", FT_REGULAR_TABLE_NAME,
+                "JOIN", FT_INODE_TABLE_NAME, "USING(inode_id)",
+                "JOIN", FT_RESOURCE_TABLE_NAME, "USING(resource_id)",
+                "ORDER BY", "resource_id",
+            ),
+            _regular_file_row_factory,
+        )
+        # fmt: on
 
     def iter_non_regular_entries(self) -> Generator[NonRegularFileRow]:
-        with FileTableNonRegularORM(self.connect_fstable_db()) as orm:
-            # fmt: off
-            yield from orm.orm_select_entries(
-                _stmt=gen_sql_stmt(
-                    "SELECT", "path,uid,gid,mode,xattrs,meta",
-                    "FROM", FT_NON_REGULAR_TABLE_NAME,
-                    "JOIN", FT_INODE_TABLE_NAME, "USING(inode_id)",
-                ),
-                _row_factory=NonRegularFileRow.table_row_factory2,
-            )
-            # fmt: on
+        # fmt: off
+        yield from self._iter_query(
+            gen_sql_stmt(
+                "SELECT", "path,uid,gid,mode,xattrs,meta",
+                "FROM", FT_NON_REGULAR_TABLE_NAME,
+                "JOIN", FT_INODE_TABLE_NAME, "USING(inode_id)",
+            ),
+            NonRegularFileRow.table_row_factory2,
+        )
+        # fmt: on
 
     def iter_common_regular_entries_by_digest(
         self,
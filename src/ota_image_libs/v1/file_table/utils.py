@@ -16,20 +16,47 @@ from __future__ import annotations
 
 import os
 import stat
+import threading
 from pathlib import Path
-from shutil import copyfileobj
 from typing import Any, Callable
 
 from ota_image_libs.common import MsgPackedDict
+from ota_image_libs.common.io import copy_fd
 from ota_image_libs.v1.file_table.db import DirRow, NonRegularFileRow, RegularFileRow
 
 DEFAULT_PERMISSIONS = 0o100644
+COPY_BUFSIZE = 1024**2  # 1MiB
 
+_thread_local = threading.local()
 
-def _copyfile_slim(src: Path, dst: Path) -> None:  # pragma: no cover
-    """A simple wrapper around shutil.copyfileobj."""
-    with open(src, "rb") as _src, open(dst, "wb") as _dst:
-        copyfileobj(_src, _dst)
+
+def _get_copy_buffer() -> memoryview:
+    """Get the per-thread copy buffer, allocate it at first use."""
+    try:
+        return _thread_local.copy_buffer
+    except AttributeError:
+        _thread_local.copy_buffer = _view = memoryview(bytearray(COPY_BUFSIZE))
+        return _view
+
+
+def _copyfile_slim(src: Path, dst: Path) -> None:
+    """Copy <src> to <dst>.
+
+    The copy is done in kernel with copy_file_range if possible, which also
+        enables reflink on the filesystems supporting it. Otherwise, the copy
+        is done with the per-thread reusable copy buffer.
+    """
+    _src_fd = os.open(src, os.O_RDONLY | os.O_CLOEXEC)
+    try:
+        _dst_fd = os.open(
+            dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644
+        )
+        try:
+            copy_fd(_src_fd, _dst_fd, buffer=_get_copy_buffer())
+        finally:
+            os.close(_dst_fd)
+    finally:
+        os.close(_src_fd)
 
 
 class PrepareEntryFailed(Exception):  # pragma: no cover
@@ -45,8 +72,11 @@ class PrepareEntryFailed(Exception):  # pragma: no cover
 
 
 def _set_xattr(path: Path, _in: MsgPackedDict) -> None:  # pragma: no cover
+    # NOTE: encode the path to bytes once, instead of converting the Path object
+    #       at each setxattr call.
+    _path, _setxattr = os.fsencode(path), os.setxattr
     for k, v in _in.items():
-        os.setxattr(path, k, v, follow_symlinks=False)
+        _setxattr(_path, k, v, follow_symlinks=False)
 
 
 def fpath_on_target(
@@ -57,10 +87,19 @@ def fpath_on_target(
     return _target_on_mnt
 
 
-def prepare_dir(entry: DirRow, *, target_mnt: Path) -> None:
-    _target_on_mnt = fpath_on_target(Path(entry.path), target_mnt=target_mnt)
+def _entry_fpath_on_target(_entry_path: str, target_mnt: Path) -> Path:
+    """Return the fpath of canonical <_entry_path> joined to `target_mnt`.
+
+    Same as `fpath_on_target` with canonical_root="/", but joins the paths as str
+        and creates only one Path object.
+    """
+    return Path(os.path.join(target_mnt, _entry_path.lstrip("/")))
+
+
+def prepare_dir(entry: DirRow, *, target_mnt: Path, parents: bool = True) -> None:
+    _target_on_mnt = _entry_fpath_on_target(entry.path, target_mnt)
     try:
-        _target_on_mnt.mkdir(exist_ok=True, parents=True)
+        _target_on_mnt.mkdir(exist_ok=True, parents=parents)
         os.chown(_target_on_mnt, uid=entry.uid, gid=entry.gid)
         os.chmod(_target_on_mnt, mode=entry.mode)
         if xattrs := entry.xattrs:
@@ -69,8 +108,27 @@ def prepare_dir(entry: DirRow, *, target_mnt: Path) -> None:
         raise PrepareEntryFailed(entry) from e
 
 
+def prepare_dirs_batch(entries: list[DirRow], *, target_mnt: Path) -> None:
+    """Prepare a batch of dirs, <entries> will be sorted by path in place.
+
+    With the dirs sorted by path, parents are always prepared before children.
+        For a dir whose parent is already prepared within this batch, only the dir
+        itself is created, without walking through its ancestors again.
+    """
+    entries.sort(key=lambda _entry: _entry.path)
+    _prepared: set[str] = set()
+    for entry in entries:
+        _path = entry.path
+        prepare_dir(
+            entry,
+            target_mnt=target_mnt,
+            parents=os.path.dirname(_path) not in _prepared,
+        )
+        _prepared.add(_path)
+
+
 def prepare_non_regular(entry: NonRegularFileRow, *, target_mnt: Path) -> None:
-    _target_on_mnt = fpath_on_target(Path(entry.path), target_mnt=target_mnt)
+    _target_on_mnt = _entry_fpath_on_target(entry.path, target_mnt)
     try:
         if stat.S_ISLNK(entry.mode):
             _symlink_target_raw = entry.meta
@@ -118,7 +176,7 @@ def prepare_regular_copy(
     copyfile_util: Callable[[Path, Path], None] = _copyfile_slim,
 ) -> Path:
     _uid, _gid, _mode = entry.uid, entry.gid, entry.mode
-    _target_on_mnt = fpath_on_target(Path(entry.path), target_mnt=target_mnt)
+    _target_on_mnt = _entry_fpath_on_target(entry.path, target_mnt)
     try:
         _target_on_mnt.touch(exist_ok=True, mode=_mode)
         copyfile_util(_rs, _target_on_mnt)
@@ -139,22 +197,32 @@ def prepare_regular_copy(
 def prepare_regular_inlined(entry: RegularFileRow, *, target_mnt: Path) -> Path:
     _contents = entry.contents
     _uid, _gid, _mode = entry.uid, entry.gid, entry.mode
-    _target_on_mnt = fpath_on_target(Path(entry.path), target_mnt=target_mnt)
+    _target_on_mnt = _entry_fpath_on_target(entry.path, target_mnt)
     try:
         assert _contents or entry.size == 0, "not an inlined entry!"
 
-        _target_on_mnt.touch(exist_ok=True, mode=_mode)
-        if _contents:
-            _target_on_mnt.write_bytes(_contents)
+        # NOTE: open the target once, and apply the contents and metadata
+        #       all via the fd, without looking up the path again.
+        _fd = os.open(
+            _target_on_mnt, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, _mode
+        )
+        try:
+            if _contents:
+                _view = memoryview(_contents)
+                while _view:
+                    _view = _view[os.write(_fd, _view) :]
+
+            if not (_uid == 0 and _gid == 0):
+                # NOTE: if owner is changed, the sticky bit will be reset.
+                #       Remember to always put chown before chmod !!!
+                os.fchown(_fd, _uid, _gid)
+                os.fchmod(_fd, _mode)
 
-        if not (_uid == 0 and _gid == 0):
-            # NOTE: if owner is changed, the sticky bit will be reset.
-            #       Remember to always put chown before chmod !!!
-            os.chown(_target_on_mnt, uid=_uid, gid=_gid)
-            os.chmod(_target_on_mnt, mode=_mode)
-
-        if _xattr := entry.xattrs:
-            _set_xattr(_target_on_mnt, _in=_xattr)
+            if _xattr := entry.xattrs:
+                for k, v in _xattr.items():
+                    os.setxattr(_fd, k, v)
+        finally:
+            os.close(_fd)
         return _target_on_mnt
     except Exception as e:
         _target_on_mnt.unlink(missing_ok=True)
@@ -168,7 +236,7 @@ def prepare_regular_hardlink(
     target_mnt: Path,
     hardlink_skip_apply_permission: bool = False,
 ) -> Path:
-    _target_on_mnt = fpath_on_target(Path(entry.path), target_mnt=target_mnt)
+    _target_on_mnt = _entry_fpath_on_target(entry.path, target_mnt)
     try:
         # NOTE: os.link will make dst a hardlink to src.
         os.link(_rs, _target_on_mnt)
@@ -22,8 +22,6 @@ from cryptography.hazmat.primitives.asymmetric.ec import (
 )
 from cryptography.hazmat.primitives.serialization import (
     Encoding,
-    NoEncryption,
-    PrivateFormat,
     PublicFormat,
     load_pem_private_key,
 )
@@ -77,14 +75,12 @@ def compose_index_jwt(
     except Exception as e:
         raise ValueError("Not an ECDSA private key") from e
 
+    # NOTE: pass the loaded key directly, instead of re-encoding it to PEM
+    #       and letting the JWT lib parse it again.
     return compose_jwt(
         payload=claims_dict,
         headers=extra_headers,
-        priv_key=_loaded_priv_key.private_bytes(
-            encoding=Encoding.PEM,
-            format=PrivateFormat.PKCS8,
-            encryption_algorithm=NoEncryption(),
-        ),
+        priv_key=_loaded_priv_key,
         alg=ALLOWED_JWT_ALG,
     )
 
@@ -26,6 +26,8 @@ from simple_sqlite3_orm import (
 )
 from simple_sqlite3_orm.utils import enable_mmap, enable_wal_mode
 
+from ota_image_libs.common.db_utils import enable_query_only, iter_cursor_in_batch
+
 from . import RST_MANIFEST_TABLE_NAME
 from .schema import ResourceTableManifest
 
@@ -56,12 +58,18 @@ class ResourceTableDBHelper:
             orm.orm_bootstrap_db()
 
     def connect_rstable_db(
-        self, *, enable_wal: bool = False, enable_mmap_size: int | None = None
+        self,
+        *,
+        enable_wal: bool = False,
+        enable_mmap_size: int | None = None,
+        query_only: bool = False,
     ) -> sqlite3.Connection:
         _conn = sqlite3.connect(self.db_f, check_same_thread=False, timeout=DB_TIMEOUT)
         if enable_wal:
             enable_wal_mode(_conn)
-        if enable_mmap_size and enable_mmap_size > 0:
+        if query_only:
+            enable_query_only(_conn)
+        elif enable_mmap_size and enable_mmap_size > 0:
             enable_mmap(_conn, enable_mmap_size)
         return _conn
 
@@ -72,10 +80,12 @@ class ResourceTableDBHelper:
 
         NOTE: the target table must has rowid defined!
         """
-        with closing(self.connect_rstable_db()) as rst_conn:
-            orm = ResourceTableORM(rst_conn)
+        with closing(self.connect_rstable_db(query_only=True)) as rst_conn:
+            rst_conn.row_factory = ResourceTableManifest.table_row_factory
             _this_batch = []
-            for _entry in orm.orm_select_entries():
+            for _entry in iter_cursor_in_batch(
+                rst_conn.execute(f"SELECT * FROM {RST_MANIFEST_TABLE_NAME}")
+            ):
                 _this_batch.append(_entry)
                 if len(_this_batch) >= batch_size:
                     random.shuffle(_this_batch)
@@ -84,6 +94,19 @@ class ResourceTableDBHelper:
             random.shuffle(_this_batch)
             yield from _this_batch
 
+    def select_blobs_digest_with_size(self) -> Generator[tuple[bytes, int]]:
+        """Select digest and size of all the resources stored as blob in the image.
+
+        A resource that has no filter applied is stored as it in the blob storage.
+        """
+        with closing(self.connect_rstable_db(query_only=True)) as rst_conn:
+            yield from iter_cursor_in_batch(
+                rst_conn.execute(
+                    f"SELECT digest,size FROM {RST_MANIFEST_TABLE_NAME} "
+                    "WHERE filter_applied IS NULL"
+                )
+            )
+
     def get_orm(self, conn: sqlite3.Connection | None = None) -> ResourceTableORM:
         """Get ORM instance for the resource table."""
         if conn is not None:
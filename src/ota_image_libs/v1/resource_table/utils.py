@@ -17,7 +17,6 @@ from __future__ import annotations
 
 import itertools
 import os
-import shutil
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
@@ -31,7 +30,7 @@ from typing_extensions import TypeAlias
 
 from ota_image_libs._resource_filter import BundleFilter, CompressFilter, SliceFilter
 from ota_image_libs.common import tmp_fname
-from ota_image_libs.common.io import file_sha256, remove_file
+from ota_image_libs.common.io import copy_fd, file_sha256, remove_file
 
 from .db import ResourceTableDBHelper, ResourceTableORMPool
 from .schema import ResourceTableManifest
@@ -85,10 +84,11 @@ def recreate_sliced_resource(
     assert isinstance(filter_cfg, SliceFilter)
 
     tmp_save_dst = save_dst.parent / tmp_fname(str(entry.resource_id))
-    with open(tmp_save_dst, "wb") as dst:
+    with open(tmp_save_dst, "wb", buffering=0) as dst:
+        _dst_fd = dst.fileno()
         for _slice in slices:
-            with open(_slice, "rb") as _slice_f:
-                shutil.copyfileobj(_slice_f, dst, SLICE_READ_BUFFER_SIZE)
+            with open(_slice, "rb", buffering=0) as _slice_f:
+                copy_fd(_slice_f.fileno(), _dst_fd, chunk_size=SLICE_READ_BUFFER_SIZE)
     os.replace(tmp_save_dst, save_dst)
 
 
@@ -107,6 +107,56 @@ def recreate_zstd_compressed_resource(
     os.replace(tmp_save_dst, save_dst)
 
 
+class _ChainedSlicesReader:
+    """A read-only file-like object that reads through <slices> in order."""
+
+    def __init__(self, slices: list[Path]) -> None:
+        self._slices = iter(slices)
+        self._cur = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        if self._cur is not None:
+            self._cur.close()
+            self._cur = None
+
+    def read(self, size: int = -1) -> bytes:
+        while True:
+            if self._cur is None:
+                if (_next := next(self._slices, None)) is None:
+                    return b""
+                self._cur = open(_next, "rb")
+
+            if _data := self._cur.read(size):
+                return _data
+            self.close()
+
+
+def recreate_zstd_compressed_resource_from_slices(
+    entry: ResourceTableManifest,
+    slices: list[Path],
+    save_dst: Path,
+    dctx: zstandard.ZstdDecompressor,
+) -> None:
+    """Decompress the zstd compressed resource directly from its slices.
+
+    The compressed resource itself is never written to disk.
+    """
+    filter_cfg = entry.filter_applied
+    assert isinstance(filter_cfg, CompressFilter)
+    tmp_save_dst = save_dst.parent / tmp_fname(str(entry.resource_id))
+
+    with _ChainedSlicesReader(slices) as src, open(tmp_save_dst, "wb") as dst:
+        dctx.copy_stream(src, dst)
+    os.replace(tmp_save_dst, save_dst)
+
+
 @dataclass
 class ResourceDownloadInfo:
     digest: bytes
@@ -273,7 +323,25 @@ class PrepareResourceHelper:
             )
             return
 
-        # if the compressed entry is sliced, we still need to first recover from slices
+        # if the compressed entry is sliced, decompress from the slices directly,
+        #   without recreating the compressed resource on disk.
+        if isinstance(compressed_entry.filter_applied, SliceFilter):
+            slices_fpaths = yield from self._prepare_slices(compressed_entry)
+            try:
+                recreate_zstd_compressed_resource_from_slices(
+                    entry,
+                    slices_fpaths,
+                    save_dst,
+                    dctx=self._thread_local_dctx,
+                )
+            except Exception as e:
+                _err_msg = f"failure during decompressing from slices: {entry}: {e}"
+                raise CompressedRecreateFailed(_err_msg) from e
+            finally:
+                for _slice in slices_fpaths:
+                    _slice.unlink(missing_ok=True)
+            return
+
         compressed_save_dst = self._download_dir / compressed_digest.hex()
         if (
             not compressed_save_dst.is_file()
@@ -314,9 +382,10 @@ class PrepareResourceHelper:
         )
         os.replace(_slice_save_tmp, slice_save_dst)
 
-    def _prepare_sliced_resources(
-        self, entry: ResourceTableManifest, save_dst: Path
-    ) -> Generator[ResourceDownloadInfo]:
+    def _prepare_slices(
+        self, entry: ResourceTableManifest
+    ) -> Generator[ResourceDownloadInfo, None, list[Path]]:
+        """Prepare all the slices of <entry>, return the slices' fpaths in order."""
         assert isinstance(entry.filter_applied, SliceFilter)
         slices_rsid = entry.filter_applied.list_resource_id()
         slices_fpaths: list[Path] = []
@@ -337,7 +406,12 @@ class PrepareResourceHelper:
             )
             yield from self._prepare_one_slice(_slice_save_dst, _slice_entry)
             slices_fpaths.append(_slice_save_dst)
+        return slices_fpaths
 
+    def _prepare_sliced_resources(
+        self, entry: ResourceTableManifest, save_dst: Path
+    ) -> Generator[ResourceDownloadInfo]:
+        slices_fpaths = yield from self._prepare_slices(entry)
         try:
             recreate_sliced_resource(entry, slices_fpaths, save_dst)
         except Exception as e:
@@ -416,7 +490,7 @@ class ResumeOTADownloadHelper:
     ) -> None:
         self._download_dir = download_dir
         self._rst_orm_pool = rst_helper.get_orm_pool(db_conn_num)
-        self._se = threading.Semaphore(max_concurrent)
+        self._se = threading.BoundedSemaphore(max_concurrent)
 
     def _check_one_resource_at_thread(
         self,
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 import json
 import logging
+import queue
 import sys
 import threading
 import time
 from functools import wraps
-from typing import Callable, NoReturn, TypeVar
+from typing import Any, Callable, Generator, Iterable, NoReturn, TypeVar
 
 from typing_extensions import ParamSpec
 
@@ -34,15 +35,200 @@ def exit_with_err_msg(err_msg: str, exit_code: int = 1) -> NoReturn:
     sys.exit(exit_code)
 
 
-def func_call_with_se(
-    _func: Callable[P, RT], se: threading.Semaphore
-) -> Callable[P, RT]:
-    @wraps(_func)
-    def _wrapped(*args, **kwargs) -> RT:
-        se.acquire()
-        return _func(*args, **kwargs)
-
-    return _wrapped
+_SENTINEL = object()
+
+
+class BoundedWorkerPool:
+    """A pool of long-lived worker threads consuming tasks from a bounded queue.
+
+    Unlike `ThreadPoolExecutor.submit` gated by a semaphore, dispatching a task is
+        only one `queue.put`, no Future and done-callback is created per task.
+        The `max_pending` size of the queue provides back-pressure to the dispatcher.
+
+    Exceptions raised by tasks are captured, the last one is exposed by `last_exc`,
+        caller should check it and stop dispatching when it is set.
+
+    If <finalizer> is specified, it is called once at each worker thread when
+        the worker exits.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int,
+        max_pending: int,
+        initializer: Callable[[], Any] | None = None,
+        finalizer: Callable[[], Any] | None = None,
+        thread_name_prefix: str = "",
+    ) -> None:
+        self._max_workers = max_workers
+        self._initializer = initializer
+        self._finalizer = finalizer
+        self._thread_name_prefix = thread_name_prefix or "bounded_worker"
+
+        self._que: queue.Queue[Any] = queue.Queue(maxsize=max_pending)
+        self._workers: list[threading.Thread] = []
+        self._last_exc: BaseException | None = None
+
+    def __enter__(self):
+        for _idx in range(self._max_workers):
+            _t = threading.Thread(
+                target=self._worker,
+                name=f"{self._thread_name_prefix}_{_idx}",
+                daemon=True,
+            )
+            _t.start()
+            self._workers.append(_t)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        return False
+
+    @property
+    def last_exc(self) -> BaseException | None:
+        return self._last_exc
+
+    def _worker(self) -> None:
+        _initialized = True
+        if self._initializer is not None:
+            try:
+                self._initializer()
+            except Exception as e:
+                # NOTE: still keep consuming the queue to not block the dispatcher,
+                #       the tasks will be dropped with last_exc set.
+                self._last_exc = e
+                _initialized = False
+
+        _que = self._que
+        while (_task := _que.get()) is not _SENTINEL:
+            if not _initialized:
+                continue
+            _func, _args = _task
+            try:
+                _func(*_args)
+            except Exception as e:
+                self._last_exc = e
+
+        if _initialized and self._finalizer is not None:
+            try:
+                self._finalizer()
+            except Exception as e:
+                self._last_exc = e
+
+    def submit(self, _func: Callable[..., Any], *args: Any) -> None:
+        """Put a task into the queue, block when the queue is full."""
+        self._que.put((_func, args))
+
+    def shutdown(self) -> None:
+        """Wait for all the pending tasks to finish and stop the workers."""
+        for _ in self._workers:
+            self._que.put(_SENTINEL)
+        for _t in self._workers:
+            _t.join()
+        self._workers.clear()
+
+
+class InflightBytesLimiter:
+    """Bound the total size of in-flight tasks.
+
+    Each task reserves tokens of its estimated size before being dispatched, and
+        releases them when done. Compared to a semaphore on the tasks count, the
+        dispatching is paced by the amount of IO actually in flight.
+
+    The reservation of each task is at least <min_cost>, and at most <max_bytes> to
+        not block forever on task larger than the budget.
+    """
+
+    def __init__(self, max_bytes: int, *, min_cost: int = 1) -> None:
+        self._max_bytes = max_bytes
+        self._min_cost = max(1, min(min_cost, max_bytes))
+        self._inflight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def acquire(self, size: int, *, timeout: float | None = None) -> int | None:
+        """Block until <size> bytes can be reserved, return the reserved tokens.
+
+        Returns None if the tokens cannot be reserved within <timeout>.
+        """
+        _tokens = min(max(size, self._min_cost), self._max_bytes)
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._inflight + _tokens <= self._max_bytes, timeout=timeout
+            ):
+                return None
+            self._inflight += _tokens
+        return _tokens
+
+    def release(self, tokens: int) -> None:
+        with self._cond:
+            self._inflight -= tokens
+            self._cond.notify_all()
+
+
+def iter_in_background(
+    _iterable: Iterable[T],
+    *,
+    max_pending: int,
+    batch_size: int = 1,
+    thread_name: str = "",
+) -> Generator[T]:
+    """Consume <_iterable> in a background producer thread.
+
+    Items are passed from the producer to the caller in batches of <batch_size>
+        via a queue bounded by <max_pending> batches. This allows the (blocking)
+        item fetching, like iterating through a DB cursor, to overlap with
+        the processing of items at the caller side.
+
+    Exception raised by the producer is re-raised at the caller side.
+    """
+    _que: queue.Queue[Any] = queue.Queue(maxsize=max_pending)
+    _stop = threading.Event()
+    _producer_exc: list[BaseException] = []
+
+    def _producer() -> None:
+        _it = iter(_iterable)
+        try:
+            _batch: list[T] = []
+            for _item in _it:
+                if _stop.is_set():
+                    return
+                _batch.append(_item)
+                if len(_batch) >= batch_size:
+                    _que.put(_batch)
+                    _batch = []
+            if _batch:
+                _que.put(_batch)
+        except Exception as e:
+            _producer_exc.append(e)
+        finally:
+            if _close := getattr(_it, "close", None):
+                _close()
+            _que.put(_SENTINEL)
+
+    _t = threading.Thread(
+        target=_producer, name=thread_name or "background_producer", daemon=True
+    )
+    _t.start()
+    _exhausted = False
+    try:
+        while (_batch := _que.get()) is not _SENTINEL:
+            yield from _batch
+        _exhausted = True
+    finally:
+        # NOTE: if the caller stops early, drain the queue to unblock the producer.
+        if not _exhausted:
+            _stop.set()
+            while _que.get() is not _SENTINEL:
+                pass
+        _t.join()
+
+    if _producer_exc:
+        raise _producer_exc[0]
 
 
 def measure_timecost(_func: Callable[P, RT]) -> Callable[P, RT]:
@@ -29,11 +29,14 @@ from ota_image_tools._utils import (
 )
 from ota_image_tools.libs.deploy_image import (
     CONCURRENT_JOBS,
-    READ_SIZE,
+    INFLIGHT_BYTES,
+    IO_WORKERS_NUM,
     WORKERS_NUM,
+    ZSTD_READ_SIZE,
     OTAImageDeployerSetup,
     ResourcesDeployer,
     RootfsDeployer,
+    get_optimal_read_size,
 )
 
 if TYPE_CHECKING:
@@ -95,18 +98,40 @@ def deploy_image_cmd_args(
         f"(current value: {WORKERS_NUM}).",
         default=WORKERS_NUM,
     )
+    deploy_image_arg_parser.add_argument(
+        "--io-workers",
+        type=int,
+        help="The number of workers for copying resources stored as it in the image. "
+        "If not specified, will be calculated from `min(64, (os.cpu_count() or 1) * 4)` "
+        f"(current value: {IO_WORKERS_NUM}).",
+        default=IO_WORKERS_NUM,
+    )
     deploy_image_arg_parser.add_argument(
         "--concurrent",
         type=int,
         help="The maximum allowed concurrent jobs during rootfs deploying.",
         default=CONCURRENT_JOBS,
     )
+    deploy_image_arg_parser.add_argument(
+        "--inflight-bytes",
+        type=int,
+        help="The maximum total size of resources being deployed at the same time. "
+        "Adjust this value to match the throughput of the target disk.",
+        default=INFLIGHT_BYTES,
+    )
     deploy_image_arg_parser.add_argument(
         "--read-size",
         type=int,
         help="The maximum read buffer size for every `read` to the image artifact. "
-        "Adjust this value when the `deploy-image` cmd uses too much memory.",
-        default=READ_SIZE,
+        "Adjust this value when the `deploy-image` cmd uses too much memory. "
+        "If not specified, will be derived from the read-ahead setting of the device "
+        "holding the image artifact.",
+    )
+    deploy_image_arg_parser.add_argument(
+        "--zstd-read-size",
+        type=int,
+        help="The input chunk size for decompressing zstd compressed resources.",
+        default=ZSTD_READ_SIZE,
     )
     deploy_image_arg_parser.set_defaults(handler=measure_timecost(deploy_image_cmd))
 
@@ -180,8 +205,11 @@ def deploy_image_cmd(args: Namespace) -> None:  # pragma: no cover
             resource_dir=resource_dir,
             tmp_dir=resource_deploy_tmp_dir,
             workers_num=args.workers,
+            io_workers_num=args.io_workers,
             concurrent_jobs=args.concurrent,
-            read_size=args.read_size,
+            read_size=args.read_size or get_optimal_read_size(image),
+            zstd_read_size=args.zstd_read_size,
+            inflight_bytes=args.inflight_bytes,
         )
         _count, _size = resource_deployer.deploy_resources()
         logger.info(f"totally {_count} resources ({_size} bytes) have been deployed!")
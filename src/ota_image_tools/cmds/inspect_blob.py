@@ -20,6 +20,7 @@ import sys
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+from ota_image_libs.common.io import copy_fd
 from ota_image_libs.common.oci_spec import Sha256Digest
 from ota_image_libs.v1.artifact.reader import OTAImageArtifactReader
 from ota_image_libs.v1.consts import RESOURCE_DIR
@@ -79,7 +80,10 @@ def _inspect_blob_from_folder(
 
     if save_dst:
         print(f"Save blob to {save_dst} ...")
-        shutil.copy(_resource, save_dst)
+        # NOTE: copy with copy_file_range/sendfile, the blob will not go through
+        #       the userspace if possible.
+        with open(_resource, "rb") as _src, open(save_dst, "wb") as _dst:
+            copy_fd(_src.fileno(), _dst.fileno(), chunk_size=READ_SIZE)
         return
 
     with open(_resource, "rb" if to_bytes else "r") as f:
@@ -16,15 +16,19 @@
 from __future__ import annotations
 
 import logging
+import os
+import tempfile
 import threading
-from concurrent.futures import ThreadPoolExecutor
 from hashlib import sha256
 from pathlib import Path
-from typing import TYPE_CHECKING, Iterator
+from typing import TYPE_CHECKING, Generator, Iterator
 
 from ota_image_libs.v1.consts import RESOURCE_DIR
+from ota_image_libs.v1.image_index.utils import ImageIndexHelper
+from ota_image_libs.v1.resource_table import RESOURCE_TABLE_FNAME
+from ota_image_libs.v1.resource_table.db import ResourceTableDBHelper
 from ota_image_libs.v1.utils import check_if_valid_ota_image
-from ota_image_tools._utils import exit_with_err_msg
+from ota_image_tools._utils import BoundedWorkerPool, exit_with_err_msg
 
 if TYPE_CHECKING:
     from argparse import ArgumentParser, Namespace, _SubParsersAction
@@ -45,10 +49,13 @@ class FileDigestHelper:
         worker_threads: int,
         max_concurrent: int | None = None,
         read_size: int = READ_CHUNK_SIZE,
+        expected_sizes: dict[bytes, int] | None = None,
     ) -> None:
         self._resource_dir = resource_dir
+        # if provided, blobs with size mismatched will be reported without hashing
+        self._expected_sizes = expected_sizes or {}
         self._worker_threads = worker_threads
-        self._se = threading.Semaphore(
+        self._max_concurrent = (
             max_concurrent
             if max_concurrent and max_concurrent > 0
             else worker_threads * 6
@@ -63,21 +70,58 @@ class FileDigestHelper:
         self._thread_local.buffer = buffer = bytearray(self._read_chunk_size)
         self._thread_local.view = memoryview(buffer)
 
-    def _file_digest_at_thread(self, fpath: Path, expected_digest: str):
+    def _get_expected_size(self, digest_hex: str) -> int | None:
+        if not self._expected_sizes:
+            return None
+        try:
+            return self._expected_sizes.get(bytes.fromhex(digest_hex))
+        except ValueError:
+            return None
+
+    def _file_digest_at_thread(self, fpath: str, expected_digest: str):
         """Copied from Python 3.13 stdlib hashlib.file_digest.
 
         Simplified as we know the `fileobj` represents an actual file.
         """
         try:
-            buf = self._thread_local.buffer
             view = self._thread_local.view
+            buf_size = len(view)
 
             digestobj = sha256()
-            with open(fpath, "rb") as fileobj:
-                while (size := fileobj.readinto(buf)) > 0:
+            # NOTE: read with raw file object, the reads go to our buffer directly.
+            with open(fpath, "rb", buffering=0) as fileobj:
+                _fd = fileobj.fileno()
+                _expected_size = self._get_expected_size(expected_digest)
+                if (
+                    _expected_size is not None
+                    and (_size := os.fstat(_fd).st_size) != _expected_size
+                ):
+                    self._last_failed_digest = expected_digest
+                    print(
+                        f"Find broken blob {fpath}: size mismatch: "
+                        f"{_size=}, {_expected_size=}"
+                    )
+                    return None
+
+                os.posix_fadvise(_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                _readinto = fileobj.readinto
+                while True:
+                    # NOTE: fill up the buffer before updating the digest, so that each
+                    #       update hashes as much data as possible with GIL released.
+                    size = 0
+                    while size < buf_size and (_read := _readinto(view[size:])):
+                        size += _read
+                    if size == 0:
+                        break  # EOF
+
                     if self._should_exit.is_set():
                         return None
                     digestobj.update(view[:size])
+                    if size < buf_size:
+                        break  # EOF
+                # NOTE: each blob is only read once, drop it from the page cache
+                #       to not evict other useful pages.
+                os.posix_fadvise(_fd, 0, 0, os.POSIX_FADV_DONTNEED)
             if digestobj.hexdigest() != expected_digest:
                 self._last_failed_digest = expected_digest
                 print(f"Find broken blob {fpath}: calculated: {digestobj.hexdigest()}")
@@ -85,42 +129,70 @@ class FileDigestHelper:
             self._should_exit.set()
             self._last_failed_digest = expected_digest
             print(f"Error during processing {fpath}: {e}")
-        finally:
-            self._se.release()
 
-    def digest_files(self, digests_to_check: Iterator[str] | None = None):
+    def _iter_blobs(
+        self, digests_to_check: Iterator[str] | None = None
+    ) -> Generator[tuple[str, str]]:
+        """Yield the fpath and fname of blobs to check."""
         if digests_to_check:
-            _blobs_gen = (self._resource_dir / digest for digest in digests_to_check)
-        else:
-            _blobs_gen = self._resource_dir.iterdir()
+            _resource_dir = str(self._resource_dir)
+            for _digest in digests_to_check:
+                yield os.path.join(_resource_dir, _digest), _digest
+            return
 
-        with ThreadPoolExecutor(
+        with os.scandir(self._resource_dir) as it:
+            for entry in it:
+                yield entry.path, entry.name
+
+    def digest_files(self, digests_to_check: Iterator[str] | None = None):
+        with BoundedWorkerPool(
             max_workers=self._worker_threads,
-            thread_name_prefix="ota_image_sysimg_processer",
+            max_pending=self._max_concurrent,
             # initialize buffer at thread worker starts up
             initializer=self._thread_worker_initializer,
+            thread_name_prefix="ota_image_sysimg_processer",
         ) as worker_pool:
             _count = 0
-            for _count, blob_fpath in enumerate(_blobs_gen, start=1):
+            for _count, (blob_fpath, blob_fname) in enumerate(
+                self._iter_blobs(digests_to_check), start=1
+            ):
                 if _count % REPORT_BATCH == 0:
                     print(f"{_count} blobs are processed ...")
                 if self._should_exit.is_set():
                     exit_with_err_msg(f"Find broken blob: {self._last_failed_digest}!")
 
-                if len(blob_fpath.name) != SHA256_DIGEST_HEX_SIZE:
+                if len(blob_fname) != SHA256_DIGEST_HEX_SIZE:
                     print(
-                        f"WARNING: find not-a-blob file in resource_dir: {blob_fpath.name}"
+                        f"WARNING: find not-a-blob file in resource_dir: {blob_fname}"
                     )
                     continue
 
                 # NOTE: in blob storage, the file name is its' own sha256 digest.
-                self._se.acquire()
-                worker_pool.submit(
-                    self._file_digest_at_thread, blob_fpath, blob_fpath.name
-                )
+                worker_pool.submit(self._file_digest_at_thread, blob_fpath, blob_fname)
         print(f"Total {_count} blobs are verified.")
 
 
+def _load_expected_blobs_size(image_root: Path) -> dict[bytes, int]:
+    """Load the size of blobs recorded in the resource_table of the image."""
+    _index_helper = ImageIndexHelper(image_root)
+    rst_descriptor = _index_helper.image_index.image_resource_table
+    if not rst_descriptor:
+        return {}
+
+    with tempfile.TemporaryDirectory() as _tmp_dir:
+        _rst_db = Path(_tmp_dir) / RESOURCE_TABLE_FNAME
+        try:
+            rst_descriptor.export_blob_from_resource_dir(
+                resource_dir=_index_helper.image_resource_dir,
+                save_dst=_rst_db,
+                auto_decompress=True,
+            )
+            return dict(ResourceTableDBHelper(_rst_db).select_blobs_digest_with_size())
+        except Exception as e:
+            logger.warning(f"failed to load resource_table, skip size precheck: {e!r}")
+            return {}
+
+
 def verify_resources_cmd_args(
     sub_arg_parser: _SubParsersAction[ArgumentParser], *parent_parser: ArgumentParser
 ) -> None:
@@ -157,7 +229,7 @@ def verify_resources_cmd(args: Namespace) -> None:
         exit_with_err_msg(f"{image_root} doesn't hold a valid OTA image!")
 
     resource_dir = image_root / RESOURCE_DIR
-    blobs_to_check = None
+    blobs_to_check, expected_sizes = None, None
     if args.blob_checksum:
         print(f"Verifying specified blobs in OTA image at {image_root} ...")
         blobs_to_check = (
@@ -167,6 +239,11 @@ def verify_resources_cmd(args: Namespace) -> None:
         print(
             f"Verifying all blobs in the resource directory in OTA image at {image_root} ..."
         )
-    FileDigestHelper(resource_dir, worker_threads=args.worker_threads).digest_files(
-        blobs_to_check
-    )
+        # NOTE: the size precheck requires loading the whole resource_table, only
+        #       worth it when verifying the whole resource directory.
+        expected_sizes = _load_expected_blobs_size(image_root)
+    FileDigestHelper(
+        resource_dir,
+        worker_threads=args.worker_threads,
+        expected_sizes=expected_sizes,
+    ).digest_files(blobs_to_check)
@@ -16,6 +16,7 @@
 from __future__ import annotations
 
 import logging
+import os
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -85,11 +86,15 @@ def verify_sign_cmd(args: Namespace) -> None:
             exit_with_err_msg(f"{_ca_dir=} is not a directry.")
 
         print("Verifying the sign cert against specified root-of-trust ...")
+        with os.scandir(_ca_dir) as it:
+            _ca_pems = b"\n".join(
+                Path(_entry.path).read_bytes() for _entry in it if _entry.is_file()
+            )
+        if not _ca_pems.strip():
+            exit_with_err_msg(f"no CA certs found under {_ca_dir=}.")
+
         _ca_store = CACertStore()
-        for _cert_f in _ca_dir.glob("*"):
-            if not _cert_f.is_file():
-                continue
-            _ca_store.add_raw_cert(_cert_f.read_bytes())
+        _ca_store.add_raw_certs(_ca_pems)
         _ca_store.verify(_sign_cert_chain.ee, interm_cas=_sign_cert_chain.interms)
 
     print("Verifying the index.jwt signature ...")
@@ -20,19 +20,25 @@ an OTA image artifact.
 
 from __future__ import annotations
 
+import contextlib
+import errno
+import io
 import os
-import shutil
 import threading
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Callable, Generator
+from zipfile import ZipInfo
 
 import zstandard
 
+from ota_image_libs.common.io import copy_fd_region
 from ota_image_libs.v1.artifact.reader import OTAImageArtifactReader
 from ota_image_libs.v1.file_table import FILE_TABLE_FNAME
-from ota_image_libs.v1.file_table.db import FileTableDBHelper, RegularFileRow
+from ota_image_libs.v1.file_table.db import DirRow, FileTableDBHelper, RegularFileRow
 from ota_image_libs.v1.file_table.utils import (
-    prepare_dir,
+    PrepareEntryFailed,
+    prepare_dirs_batch,
     prepare_non_regular,
     prepare_regular_copy,
     prepare_regular_hardlink,
@@ -42,15 +48,103 @@ from ota_image_libs.v1.image_manifest.schema import ImageIdentifier
 from ota_image_libs.v1.resource_table import RESOURCE_TABLE_FNAME
 from ota_image_libs.v1.resource_table.db import ResourceTableDBHelper
 from ota_image_libs.v1.resource_table.utils import PrepareResourceHelper
-from ota_image_tools._utils import exit_with_err_msg
+from ota_image_tools._utils import (
+    BoundedWorkerPool,
+    InflightBytesLimiter,
+    exit_with_err_msg,
+    iter_in_background,
+)
 
 IMAGE_MANIFEST_SAVE_FNAME = "image_manifest.json"
 IMAGE_CONFIG_SAVE_FNAME = "image_config.json"
 SYS_CONFIG_SAVE_FNAME = "sys_config.json"
 
 WORKERS_NUM = min(8, (os.cpu_count() or 1) + 4)
+# workers for copying resources stored as it in the artifact, which is IO-bound
+IO_WORKERS_NUM = min(64, (os.cpu_count() or 1) * 4)
 CONCURRENT_JOBS = 1024
+# the max total size of resources being deployed at the same time
+INFLIGHT_BYTES = 512 * 1024**2  # 512MiB
 READ_SIZE = 1 * 1024**2  # 1MiB
+MAX_READ_SIZE = 8 * 1024**2  # 8MiB
+# the recommended input size for zstd streaming decompression
+ZSTD_READ_SIZE = zstandard.DECOMPRESSION_RECOMMENDED_INPUT_SIZE
+# the max decompressed size of resource to be decompressed in one shot
+ZSTD_ONE_SHOT_MAX_SIZE = 16 * 1024**2  # 16MiB
+# normal regular files are dispatched to the workers in batch
+REGULAR_FILES_BATCH_SIZE = 128
+# hardlinked files are dispatched in smaller batch, as a link group head
+#   preparing blocks the other workers preparing the same link group
+HARDLINKED_FILES_BATCH_SIZE = 64
+# small resources are dispatched to the workers in batch
+SMALL_RESOURCE_SIZE = 64 * 1024  # 64KiB
+SMALL_RESOURCES_BATCH_SIZE = 32
+# digests of resources are fetched from file_table in batch in background
+DIGESTS_FETCH_BATCH_SIZE = 10_000
+DIGESTS_FETCH_MAX_PENDING = 4
+# interval for the dispatcher to check failure when waiting for dispatching
+DISPATCH_CHECK_INTERVAL = 1  # second
+# on these errors, hardlinking from the resource_dir is not possible,
+#   fallback to copy the resource instead.
+HARDLINK_FALLBACK_ERRNOS = frozenset((errno.EXDEV, errno.EMLINK))
+
+
+def get_optimal_read_size(_fpath: Path) -> int:
+    """Derive the read size from the read-ahead setting of the device holding <_fpath>.
+
+    The read size is twice the device's read-ahead, clamped between
+        READ_SIZE and MAX_READ_SIZE. If the read-ahead cannot be detected,
+        READ_SIZE is returned.
+    """
+    try:
+        _dev = os.stat(_fpath).st_dev
+        _sysfs_dev = Path(f"/sys/dev/block/{os.major(_dev)}:{os.minor(_dev)}").resolve()
+        # NOTE: for partition, the queue settings are at the parent disk device
+        for _queue in (_sysfs_dev / "queue", _sysfs_dev.parent / "queue"):
+            _read_ahead_kb = _queue / "read_ahead_kb"
+            if _read_ahead_kb.is_file():
+                _read_ahead = int(_read_ahead_kb.read_text()) * 1024
+                return max(READ_SIZE, min(MAX_READ_SIZE, _read_ahead * 2))
+    except (OSError, ValueError):
+        pass
+    return READ_SIZE
+
+
+@contextlib.contextmanager
+def open_resource_dst(_dst: Path, _size: int | None) -> Generator[io.FileIO]:
+    """Open <_dst> unbuffered for writing a resource of expected <_size>.
+
+    For resource larger than SMALL_RESOURCE_SIZE, the file space is preallocated
+        to reduce fragmentation.
+    If writing the resource failed, <_dst> is removed.
+    """
+    try:
+        with open(_dst, "wb", buffering=0) as _dst_fp:
+            if not _size or _size <= SMALL_RESOURCE_SIZE:
+                yield _dst_fp
+                return
+
+            _fd = _dst_fp.fileno()
+            # NOTE: preallocating is an optimization, ignore if not supported
+            with contextlib.suppress(OSError):
+                os.posix_fallocate(_fd, 0, _size)
+            yield _dst_fp
+            # NOTE: preallocating extends the file to <_size>, in case less data is
+            #       written, truncate the file to the actual written size.
+            if (_written := _dst_fp.tell()) != _size:
+                _dst_fp.truncate(_written)
+    except BaseException:
+        # NOTE: not leaving a partially written(or preallocated zero-filled)
+        #       resource behind.
+        _dst.unlink(missing_ok=True)
+        raise
+
+
+def _write_all(_dst_fp: io.FileIO, _data: memoryview) -> None:
+    """Write all <_data> to the unbuffered <_dst_fp>, as raw write might be partial."""
+    _written, _size = 0, len(_data)
+    while _written < _size:
+        _written += _dst_fp.write(_data[_written:])
 
 
 class SetupWorkDirFailed(Exception): ...
@@ -139,17 +233,33 @@ class ResourcesDeployer:
         tmp_dir: Path,
         rst_db_conn: int = 3,
         workers_num: int,
+        io_workers_num: int = IO_WORKERS_NUM,
         concurrent_jobs: int,
         read_size: int,
+        zstd_read_size: int = ZSTD_READ_SIZE,
+        inflight_bytes: int = INFLIGHT_BYTES,
     ) -> None:
         self._read_size = read_size
+        self._zstd_read_size = zstd_read_size
         self._workers_num = workers_num
+        self._io_workers_num = io_workers_num
 
         self._workdir_setup = workdir_setup
-        self._concurrent_se = threading.Semaphore(concurrent_jobs)
-        self._worker_finalize_barrier = threading.Barrier(workers_num)
-
-        self._last_exc = None
+        self._resource_dir = resource_dir
+        # NOTE: the minimum cost of each resource is derived from <concurrent_jobs>,
+        #       so that the number of in-flight resources is still bounded by it.
+        self._inflight_limiter = InflightBytesLimiter(
+            inflight_bytes, min_cost=inflight_bytes // max(1, concurrent_jobs)
+        )
+        self._concurrent_jobs = concurrent_jobs
+        # NOTE: lookup the blobs by raw digest, without the per-resource name lookup
+        #       in the artifact. The ZipInfo can be used with any reader of the artifact.
+        with workdir_setup.open_artifact() as artifact_reader:
+            self._blobs_info: dict[bytes, ZipInfo] = dict(
+                artifact_reader.iter_blobs_info()
+            )
+        self._pools: tuple[BoundedWorkerPool, ...] = ()
+        self._io_artifact_reader: OTAImageArtifactReader | None = None
 
         # NOTE: this helper is capable for used in multi-thread environment
         self._rst_helper = PrepareResourceHelper(
@@ -162,32 +272,122 @@ class ResourcesDeployer:
     def _thread_initializer(self) -> None:
         _thread_local = self._thread_local
         _thread_local.dctx = zstandard.ZstdDecompressor()
+        _thread_local.decompress_view = memoryview(bytearray(self._read_size))
         _thread_local.artifact_reader = self._workdir_setup.open_artifact()
 
     def _thread_worker_finalizer(self) -> None:
         _thread_local = self._thread_local
         artifact_reader: OTAImageArtifactReader = _thread_local.artifact_reader
         artifact_reader.close()
-        self._worker_finalize_barrier.wait()  # wait for all other workers finalized
 
-    def _get_resource_zstd_decompress(self, _digest: bytes, _dst: Path) -> None:
-        """Get a compressed resource from the artifact with decompressing it."""
-        dctx: zstandard.ZstdDecompressor = self._thread_local.dctx
-        artifact_reader: OTAImageArtifactReader = self._thread_local.artifact_reader
-        with artifact_reader.open_blob(_digest.hex()) as _blob, open(
-            _dst, "wb"
-        ) as _dst_fp:
-            dctx.copy_stream(_blob, _dst_fp, read_size=self._read_size)
+    def _io_thread_initializer(self) -> None:
+        # NOTE: IO workers only copy blobs' data region at explicit offsets from
+        #       the artifact fd, one artifact reader opened by deploy_resources is
+        #       shared by all IO workers, and the copy buffer is allocated on demand.
+        self._thread_local.artifact_reader = self._io_artifact_reader
+
+    def _get_copy_view(self) -> memoryview:
+        _thread_local = self._thread_local
+        if (_view := getattr(_thread_local, "decompress_view", None)) is None:
+            _view = _thread_local.decompress_view = memoryview(
+                bytearray(self._read_size)
+            )
+        return _view
+
+    def _get_blob_info(self, _digest: bytes) -> ZipInfo:
+        if (_zinfo := self._blobs_info.get(_digest)) is not None:
+            return _zinfo
+        raise FileNotFoundError(f"blob {_digest.hex()} not found in the artifact!")
+
+    def _get_resource_zstd_decompress(
+        self, _digest: bytes, _dst: Path, _origin_size: int | None = None
+    ) -> None:
+        """Get a compressed resource from the artifact with decompressing it.
+
+        For small resource whose size is recorded in the zstd frame header and matches
+            the expected <_origin_size>, the resource is decompressed in one shot.
+        Otherwise, the decompressed data is read into a per-thread buffer of
+            <read_size>, and written out from the buffer to the unbuffered <_dst>,
+            no intermediate bytes object or copy is made on the way.
+        """
+        _thread_local = self._thread_local
+        dctx: zstandard.ZstdDecompressor = _thread_local.dctx
+        artifact_reader: OTAImageArtifactReader = _thread_local.artifact_reader
+        _zinfo = self._get_blob_info(_digest)
+        # NOTE: if possible, use the zero-copy view of the blob from the
+        #       memory-mapped artifact, skipping the file-like wrapper.
+        _compressed = artifact_reader.blob_view_by_info(_zinfo)
+        if (
+            _origin_size is not None
+            and _origin_size <= ZSTD_ONE_SHOT_MAX_SIZE
+            and _zinfo.file_size <= self._read_size
+        ):
+            if _compressed is None:
+                with artifact_reader.open_blob_by_info(_zinfo) as _blob:
+                    _compressed = _blob.read()
+            # NOTE: one-shot decompress only handles the first frame, ensure the
+            #       first frame contains the whole resource.
+            if zstandard.frame_content_size(_compressed) == _origin_size:
+                with open_resource_dst(_dst, _origin_size) as _dst_fp:
+                    _write_all(_dst_fp, memoryview(dctx.decompress(_compressed)))
+                return
+
+        _blob_cm = dctx.stream_reader(
+            _compressed
+            if _compressed is not None
+            else artifact_reader.open_blob_by_info(_zinfo),
+            read_size=self._zstd_read_size,
+        )
+        _view: memoryview = _thread_local.decompress_view
+        with _blob_cm as _reader, open_resource_dst(_dst, _origin_size) as _dst_fp:
+            _readinto = _reader.readinto
+            while _read := _readinto(_view):
+                _write_all(_dst_fp, _view[:_read])
 
-    def _get_resource(self, _digest: bytes, _dst: Path) -> None:
-        """Get a resource from the artifact as it."""
+    def _get_resource(self, _zinfo: ZipInfo, _dst: Path) -> None:
+        """Get a resource from the artifact as it.
+
+        If the blob is stored as it in the artifact, copy its data region from the
+            artifact file directly with zero-copy syscalls.
+        """
         artifact_reader: OTAImageArtifactReader = self._thread_local.artifact_reader
-        with artifact_reader.open_blob(_digest.hex()) as _blob, open(
-            _dst, "wb"
+        if _region := artifact_reader.open_blob_region_by_info(_zinfo):
+            _src_fd, _offset, _size = _region
+            with open_resource_dst(_dst, _size) as _dst_fp:
+                _copied = copy_fd_region(
+                    _src_fd,
+                    _dst_fp.fileno(),
+                    offset=_offset,
+                    size=_size,
+                    chunk_size=self._read_size,
+                )
+            if _copied != _size:
+                _dst.unlink(missing_ok=True)
+                raise ValueError(
+                    f"blob {_zinfo.filename} is truncated in the artifact: {_copied=}, {_size=}"
+                )
+            return
+
+        with artifact_reader.open_blob_by_info(_zinfo) as _blob, open_resource_dst(
+            _dst, _zinfo.file_size
         ) as _dst_fp:
-            shutil.copyfileobj(_blob, _dst_fp, length=self._read_size)
+            _readinto, _view = _blob.readinto, self._get_copy_view()
+            while _read := _readinto(_view):
+                _write_all(_dst_fp, _view[:_read])
+
+    def _prepare_direct_resources_at_thread(self, _batch: list[ZipInfo]):
+        """Prepare resources stored as it in the artifact."""
+        _resource_dir, _get_resource = self._resource_dir, self._get_resource
+        for _zinfo in _batch:
+            # NOTE: in blob storage, the file name is the blob's sha256 digest.
+            _get_resource(_zinfo, _resource_dir / os.path.basename(_zinfo.filename))
 
     def _prepare_one_resource_at_thread(self, _digest: bytes):
+        # NOTE: blobs are content-addressed, if the resource is stored as it in
+        #       the artifact, directly get it without consulting the resource_table.
+        if (_zinfo := self._blobs_info.get(_digest)) is not None:
+            return self._get_resource(_zinfo, self._resource_dir / _digest.hex())
+
         _, _gen = self._rst_helper.prepare_resource_at_thread(_digest)
         for _dl_info in _gen:
             _digest, _save_dst = _dl_info.digest, _dl_info.save_dst
@@ -196,41 +396,131 @@ class ResourcesDeployer:
                     raise SetupRootfsFailed(
                         f"invalid OTA image, detect unknown compression alg: {_compression_alg}"
                     )
-                self._get_resource_zstd_decompress(_digest, _save_dst)
+                self._get_resource_zstd_decompress(
+                    _digest, _save_dst, _dl_info.compressed_origin_size
+                )
             else:
-                self._get_resource(_digest, _save_dst)
+                self._get_resource(self._get_blob_info(_digest), _save_dst)
+
+    def _prepare_resources_batch_at_thread(self, _batch: list[bytes]):
+        _prepare_one_resource = self._prepare_one_resource_at_thread
+        for _digest in _batch:
+            _prepare_one_resource(_digest)
+
+    def _run_task_at_thread(
+        self, _func: Callable[[Any], Any], _arg: Any, _tokens: int
+    ) -> None:
+        try:
+            _func(_arg)
+        finally:
+            self._inflight_limiter.release(_tokens)
+
+    def _dispatch(
+        self,
+        pool: BoundedWorkerPool,
+        _func: Callable[[Any], Any],
+        _arg: Any,
+        _size: int,
+    ) -> bool:
+        """Dispatch a task to <pool>, return False if the deployment already failed."""
+        # NOTE: failure is checked per dispatched task instead of per resource,
+        #       keeping the per-resource dispatching loop minimal.
+        if self._last_exc:
+            return False
+        while (
+            _tokens := self._inflight_limiter.acquire(
+                _size, timeout=DISPATCH_CHECK_INTERVAL
+            )
+        ) is None:
+            # NOTE: the tasks are dropped if the worker failed to initialize,
+            #       check the failure to not wait for the tokens forever.
+            if self._last_exc:
+                return False
+        pool.submit(self._run_task_at_thread, _func, _arg, _tokens)
+        return True
 
-    def _worker_cb(self, _fut: Future):
-        self._concurrent_se.release()
-        if _exc := _fut.exception():
-            self._last_exc = _exc
+    @property
+    def _last_exc(self) -> BaseException | None:
+        for _pool in self._pools:
+            if _exc := _pool.last_exc:
+                return _exc
+        return None
 
     def deploy_resources(self) -> tuple[int, int]:
         ft_helper = self._workdir_setup.file_table_helper
-        with ThreadPoolExecutor(
+        compute_pool = BoundedWorkerPool(
             max_workers=self._workers_num,
+            max_pending=self._concurrent_jobs,
             initializer=self._thread_initializer,
+            finalizer=self._thread_worker_finalizer,
             thread_name_prefix="ota_image_deployer",
-        ) as pool:
+        )
+        io_pool = BoundedWorkerPool(
+            max_workers=self._io_workers_num,
+            max_pending=self._concurrent_jobs,
+            initializer=self._io_thread_initializer,
+            thread_name_prefix="ota_image_deployer_io",
+        )
+        self._pools = (compute_pool, io_pool)
+        # NOTE: the artifact reader shared by IO workers is closed after
+        #       all the workers in the pools exit.
+        self._io_artifact_reader = self._workdir_setup.open_artifact()
+        with self._io_artifact_reader, compute_pool, io_pool:
             count, size = 0, 0
-            for _digest, _size in ft_helper.select_all_digests_with_size(
-                exclude_inlined=True
+            # NOTE: resource stored as it in the artifact only needs to be copied,
+            #       it is IO-bound and dispatched to the larger IO pool by its ZipInfo.
+            #       Other resources need to be recreated or decompressed, which are
+            #       dispatched to the compute pool by digest.
+            _batch_funcs: dict[BoundedWorkerPool, Callable[[Any], Any]] = {
+                compute_pool: self._prepare_resources_batch_at_thread,
+                io_pool: self._prepare_direct_resources_at_thread,
+            }
+            # NOTE: small resources are dispatched in batch to amortize the
+            #       per-task dispatching overhead.
+            _batches: dict[BoundedWorkerPool, list[Any]] = {
+                compute_pool: [],
+                io_pool: [],
+            }
+            _batches_size: dict[BoundedWorkerPool, int] = {
+                compute_pool: 0,
+                io_pool: 0,
+            }
+            _get_blob_info = self._blobs_info.get
+            # NOTE: fetch the digests from file_table in a producer thread,
+            #       overlapping the DB query with the dispatching.
+            for _digest, _size in iter_in_background(
+                ft_helper.select_all_digests_with_size(exclude_inlined=True),
+                max_pending=DIGESTS_FETCH_MAX_PENDING,
+                batch_size=DIGESTS_FETCH_BATCH_SIZE,
+                thread_name="ota_image_deployer_fetcher",
             ):
                 count += 1
                 size += _size
 
-                if self._last_exc:
-                    break
-
-                self._concurrent_se.acquire()
-                pool.submit(
-                    self._prepare_one_resource_at_thread,
-                    _digest,
-                ).add_done_callback(self._worker_cb)
+                if (_zinfo := _get_blob_info(_digest)) is not None:
+                    _pool, _item = io_pool, _zinfo
+                else:
+                    _pool, _item = compute_pool, _digest
 
-            # for worker finalizing
-            for _ in range(self._workers_num):
-                pool.submit(self._thread_worker_finalizer)
+                if _size >= SMALL_RESOURCE_SIZE:
+                    if not self._dispatch(_pool, _batch_funcs[_pool], [_item], _size):
+                        break
+                    continue
+
+                (_batch := _batches[_pool]).append(_item)
+                _batches_size[_pool] += _size
+                if len(_batch) >= SMALL_RESOURCES_BATCH_SIZE:
+                    if not self._dispatch(
+                        _pool, _batch_funcs[_pool], _batch, _batches_size[_pool]
+                    ):
+                        break
+                    _batches[_pool], _batches_size[_pool] = [], 0
+            else:
+                for _pool, _batch in _batches.items():
+                    if _batch:
+                        self._dispatch(
+                            _pool, _batch_funcs[_pool], _batch, _batches_size[_pool]
+                        )
 
         if _exc := self._last_exc:
             raise DeployResourcesFailed(f"failure during processing: {_exc}") from _exc
@@ -257,51 +547,70 @@ class RootfsDeployer:
         self._resource_dir = resource_dir
 
         self.max_workers = max_workers
-        self._se = threading.Semaphore(concurrent_tasks)
-        self._last_exc = None
+        self._concurrent_tasks = concurrent_tasks
 
-        self._hardlink_group_lock = threading.Lock()
+        # NOTE: the hardlink group head preparing is serialized per inode by
+        #       sharded locks, different link groups can be prepared in parallel.
+        self._hardlink_group_locks = tuple(
+            threading.Lock() for _ in range(max_workers * 4)
+        )
         self._hardlink_group: dict[int, Path] = {}
 
-    def _task_done_cb(self, _fut: Future):
-        self._se.release()  # release se first
-        if _exc := _fut.exception():
-            self._last_exc = _exc
+    def _prepare_from_resource(
+        self, _digest_hex: str, _entry: RegularFileRow, first_to_prepare: bool
+    ) -> Path:
+        """Prepare the entry from the resource in the resource_dir.
+
+        The first entry of a resource will be hardlinked to the resource, and the
+            rest of the entries will be copied from it.
+        If hardlinking is not possible(i.e., the resource_dir is on another filesystem),
+            fallback to copy.
+        """
+        _rs = self._resource_dir / _digest_hex
+        if first_to_prepare:
+            try:
+                return prepare_regular_hardlink(
+                    _entry, _rs=_rs, target_mnt=self._rootfs_dir
+                )
+            except PrepareEntryFailed as e:
+                _cause = e.__cause__
+                if not (
+                    isinstance(_cause, OSError)
+                    and _cause.errno in HARDLINK_FALLBACK_ERRNOS
+                ):
+                    raise
+        return prepare_regular_copy(_entry, _rs=_rs, target_mnt=self._rootfs_dir)
 
     def _process_hardlinked_file_at_thread(
         self, _digest_hex: str, _entry: RegularFileRow, first_to_prepare: bool
     ):
         _inode_id, _entry_size = _entry.inode_id, _entry.size
         _inlined = _entry.contents or _entry_size == 0
-        with self._hardlink_group_lock:
-            _link_group_head = self._hardlink_group.get(_inode_id)
-            if _link_group_head is not None:
-                prepare_regular_hardlink(
-                    _entry,
-                    _rs=_link_group_head,
-                    target_mnt=self._rootfs_dir,
-                    hardlink_skip_apply_permission=True,
-                )
-                return
-
-            if _inlined:
-                self._hardlink_group[_inode_id] = prepare_regular_inlined(
-                    _entry, target_mnt=self._rootfs_dir
-                )
-                return
 
-            if first_to_prepare:
-                self._hardlink_group[_inode_id] = prepare_regular_hardlink(
-                    _entry,
-                    _rs=self._resource_dir / _digest_hex,
-                    target_mnt=self._rootfs_dir,
-                )
-            else:
-                self._hardlink_group[_inode_id] = prepare_regular_copy(
-                    _entry,
-                    _rs=self._resource_dir / _digest_hex,
-                    target_mnt=self._rootfs_dir,
-                )
+        # fast path: the link group head is ready, link to it without locking
+        _link_group_head = self._hardlink_group.get(_inode_id)
+        if _link_group_head is None:
+            _locks = self._hardlink_group_locks
+            with _locks[_inode_id % len(_locks)]:
+                _link_group_head = self._hardlink_group.get(_inode_id)
+                if _link_group_head is None:
+                    if _inlined:
+                        _head = prepare_regular_inlined(
+                            _entry, target_mnt=self._rootfs_dir
+                        )
+                    else:
+                        _head = self._prepare_from_resource(
+                            _digest_hex, _entry, first_to_prepare
+                        )
+                    self._hardlink_group.setdefault(_inode_id, _head)
+                    return
+
+        prepare_regular_hardlink(
+            _entry,
+            _rs=_link_group_head,
+            target_mnt=self._rootfs_dir,
+            hardlink_skip_apply_permission=True,
+        )
 
     def _process_normal_file_at_thread(
         self, _digest_hex: str, _entry: RegularFileRow, first_to_prepare: bool
@@ -312,55 +621,82 @@ class RootfsDeployer:
             prepare_regular_inlined(_entry, target_mnt=self._rootfs_dir)
             return
 
-        if first_to_prepare:
-            prepare_regular_hardlink(
-                _entry,
-                _rs=self._resource_dir / _digest_hex,
-                target_mnt=self._rootfs_dir,
-            )
-        else:
-            prepare_regular_copy(
-                _entry,
-                _rs=self._resource_dir / _digest_hex,
-                target_mnt=self._rootfs_dir,
-            )
+        self._prepare_from_resource(_digest_hex, _entry, first_to_prepare)
+
+    def _process_normal_files_batch_at_thread(
+        self, _batch: list[tuple[str, RegularFileRow, bool]]
+    ):
+        _process_normal_file = self._process_normal_file_at_thread
+        for _digest_hex, _entry, _first_to_prepare in _batch:
+            _process_normal_file(_digest_hex, _entry, _first_to_prepare)
+
+    def _process_hardlinked_files_batch_at_thread(
+        self, _batch: list[tuple[str, RegularFileRow, bool]]
+    ):
+        _process_hardlinked_file = self._process_hardlinked_file_at_thread
+        for _digest_hex, _entry, _first_to_prepare in _batch:
+            _process_hardlinked_file(_digest_hex, _entry, _first_to_prepare)
 
     def _process_regular_file_entries(self) -> None:
-        _first_prepared_digest: set[bytes] = set()
+        pool = BoundedWorkerPool(
+            max_workers=self.max_workers,
+            # NOTE: normal files are dispatched in batch, scale the queue size
+            #       accordingly to keep the number of pending entries bounded.
+            max_pending=max(
+                self.max_workers, self._concurrent_tasks // REGULAR_FILES_BATCH_SIZE
+            ),
+            thread_name_prefix="ota_update_slot",
+        )
+        _submit = pool.submit
+        _process_hardlinked_files_batch = self._process_hardlinked_files_batch_at_thread
+        _process_normal_files_batch = self._process_normal_files_batch_at_thread
         try:
-            with ThreadPoolExecutor(
-                max_workers=self.max_workers, thread_name_prefix="ota_update_slot"
-            ) as pool:
-                for _entry in self._fst_db_helper.iter_regular_entries():
-                    if self._last_exc:
+            with pool:
+                _batch: list[tuple[str, RegularFileRow, bool]] = []
+                # NOTE: entries are grouped by digest, so the entries of the same
+                #       link group are likely to be processed in the same batch.
+                _hardlinked_batch: list[tuple[str, RegularFileRow, bool]] = []
+                # NOTE: entries are grouped by digest, the first entry of each
+                #       digest group is the first to prepare.
+                _last_digest, _digest_hex = b"", ""
+                # NOTE: fetch the entries from file_table in a producer thread,
+                #       overlapping the DB query with the dispatching.
+                for _entry in iter_in_background(
+                    self._fst_db_helper.iter_regular_entries(),
+                    max_pending=2 * self.max_workers,
+                    batch_size=REGULAR_FILES_BATCH_SIZE,
+                    thread_name="ota_update_slot_fetcher",
+                ):
+                    if pool.last_exc:
                         break
-                    self._se.acquire()
 
                     _digest = _entry.digest
-                    _digest_hex = _digest.hex()
-
-                    _first_to_prepare = False
-                    if _digest not in _first_prepared_digest:
-                        _first_to_prepare = True
-                        _first_prepared_digest.add(_digest)
+                    _first_to_prepare = _digest != _last_digest
+                    if _first_to_prepare:
+                        _last_digest, _digest_hex = _digest, _digest.hex()
 
                     _links_count = _entry.links_count
                     if _links_count is not None and _links_count > 1:
-                        pool.submit(
-                            self._process_hardlinked_file_at_thread,
-                            _digest_hex,
-                            _entry,
-                            _first_to_prepare,
-                        ).add_done_callback(self._task_done_cb)
-                    else:
-                        pool.submit(
-                            self._process_normal_file_at_thread,
-                            _digest_hex,
-                            _entry,
-                            _first_to_prepare,
-                        ).add_done_callback(self._task_done_cb)
+                        _hardlinked_batch.append(
+                            (_digest_hex, _entry, _first_to_prepare)
+                        )
+                        if len(_hardlinked_batch) >= HARDLINKED_FILES_BATCH_SIZE:
+                            _submit(_process_hardlinked_files_batch, _hardlinked_batch)
+                            _hardlinked_batch = []
+                        continue
+
+                    _batch.append((_digest_hex, _entry, _first_to_prepare))
+                    if len(_batch) >= REGULAR_FILES_BATCH_SIZE:
+                        _submit(_process_normal_files_batch, _batch)
+                        _batch = []
+
+                if not pool.last_exc:
+                    if _batch:
+                        _submit(_process_normal_files_batch, _batch)
+                    if _hardlinked_batch:
+                        _submit(_process_hardlinked_files_batch, _hardlinked_batch)
         except Exception as e:
-            if _worker_exc := self._last_exc:
+            if _worker_exc := pool.last_exc:
                 raise SetupRootfsFailed(
                     f"process regular files failed: dispatch interrupted: {e!r}, "
                     f"last workers error: {_worker_exc}"
@@ -369,19 +705,43 @@ class RootfsDeployer:
                 f"process regular files failed: dispatch interrupted: {e!r}"
             ) from e
 
-        if _exc := self._last_exc:
+        if _exc := pool.last_exc:
             raise SetupRootfsFailed(
                 f"process regular files failed: last error: {_exc!r}"
             ) from _exc
 
+    def _process_dirs_group_at_thread(self, _group: list[DirRow]) -> None:
+        try:
+            prepare_dirs_batch(_group, target_mnt=self._rootfs_dir)
+        except Exception as e:
+            raise SetupRootfsFailed(f"process dir failed: {e}") from e
+
     def _process_dir_entries(self) -> None:
+        # NOTE: group the dirs by their top-level path component, each group
+        #       is processed by one worker thread. Within a group, the dirs are
+        #       sorted by path by prepare_dirs_batch, which ensures parents are
+        #       prepared before children.
+        _groups: dict[str, list[DirRow]] = {}
         for entry in self._fst_db_helper.iter_dir_entries():
-            try:
-                prepare_dir(entry, target_mnt=self._rootfs_dir)
-            except Exception as e:
-                raise SetupRootfsFailed(
-                    f"process dir failed: failed {entry=}: {e!r}"
-                ) from e
+            _top_level = entry.path.split("/", 2)[1]
+            _groups.setdefault(_top_level, []).append(entry)
+
+        # the rootfs dir itself must be prepared before any other dirs
+        if _root_group := _groups.pop("", None):
+            self._process_dirs_group_at_thread(_root_group)
+
+        with BoundedWorkerPool(
+            max_workers=self.max_workers,
+            max_pending=self.max_workers,
+            thread_name_prefix="ota_update_slot_dirs",
+        ) as pool:
+            for _group in _groups.values():
+                if pool.last_exc:
+                    break
+                pool.submit(self._process_dirs_group_at_thread, _group)
+
+        if _exc := pool.last_exc:
+            raise SetupRootfsFailed(f"process dirs failed: {_exc!r}") from _exc
 
     def _process_non_regular_files(self) -> None:
         for entry in self._fst_db_helper.iter_non_regular_entries():
@@ -401,5 +761,25 @@ class RootfsDeployer:
             SetupRootfsFailed: if any error occurs during the process.
         """
         self._process_dir_entries()
-        self._process_non_regular_files()
-        self._process_regular_file_entries()
+        # NOTE: once the dirs are prepared, non-regular files and regular files
+        #       don't depend on each other, process them concurrently.
+        _regular_exc: Exception | None = None
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ota_update_slot_non_regular"
+        ) as pool:
+            _non_regular_fut = pool.submit(self._process_non_regular_files)
+            try:
+                self._process_regular_file_entries()
+            except Exception as e:
+                _regular_exc = e
+        _non_regular_exc = _non_regular_fut.exception()
+
+        if _regular_exc and _non_regular_exc:
+            raise SetupRootfsFailed(
+                f"{_regular_exc!r}, also process non-regular files failed: "
+                f"{_non_regular_exc!r}"
+            ) from _regular_exc
+        if _exc := _regular_exc or _non_regular_exc:
+            if isinstance(_exc, SetupRootfsFailed):
+                raise _exc
+            raise SetupRootfsFailed(f"setup rootfs failed: {_exc!r}") from _exc
@@ -28,12 +28,20 @@ from cryptography.hazmat.primitives.asymmetric.ec import (
     EllipticCurvePrivateKey,
     EllipticCurvePublicKey,
 )
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+)
 from cryptography.x509 import Certificate
 from cryptography.x509.oid import NameOID
 
 from ota_image_libs._crypto.x509_utils import X5cX509CertChain
 from ota_image_libs.common.oci_spec import Sha256Digest
+from ota_image_libs.v1.artifact.reader import OTAImageArtifactReader
 from ota_image_libs.v1.image_index.schema import ImageIndex
+from ota_image_libs.v1.image_manifest.schema import ImageIdentifier, ImageManifest
+from ota_image_libs.v1.index_jwt.utils import compose_index_jwt
 
 TEST_OTA_IMAGE = Path(__file__).parent / "data" / "ota-image.zip"
 
@@ -53,6 +61,23 @@ def extracted_ota_image(tmp_path_factory: pytest.TempPathFactory) -> Path:
     return extract_dir
 
 
+@pytest.fixture(scope="session")
+def first_image_id() -> ImageIdentifier:
+    """The ImageIdentifier of the first image payload in the test OTA image.
+
+    The image index and manifest are parsed once for the whole test session.
+    """
+    with OTAImageArtifactReader(TEST_OTA_IMAGE) as reader:
+        image_index = reader.parse_index()
+        for entry in image_index.manifests:
+            if isinstance(entry, ImageManifest.Descriptor):
+                manifest = ImageManifest.parse_metafile(
+                    reader.read_blob_as_text(entry.digest.digest_hex)
+                )
+                return manifest.image_identifier
+    raise ValueError("invalid test data!")
+
+
 def ecdsa_keypair() -> tuple[EllipticCurvePrivateKey, EllipticCurvePublicKey]:
     """Generate ECDSA key pair for testing."""
     private_key = ec.generate_private_key(ec.SECP256R1())
@@ -60,6 +85,13 @@ def ecdsa_keypair() -> tuple[EllipticCurvePrivateKey, EllipticCurvePublicKey]:
     return private_key, public_key
 
 
+@pytest.fixture(scope="session")
+def spare_ecdsa_key() -> EllipticCurvePrivateKey:
+    """An ECDSA private key not belonging to any of the test cert chain."""
+    private_key, _ = ecdsa_keypair()
+    return private_key
+
+
 @pytest.fixture(scope="session")
 def root_ca_cert() -> tuple[Certificate, EllipticCurvePrivateKey]:
     """Generate a self-signed root CA certificate."""
@@ -160,6 +192,31 @@ def end_entity_cert(intermediate_ca_cert):
     return cert, ee_key
 
 
+@pytest.fixture(scope="session")
+def ee_key_pem(end_entity_cert: tuple[Certificate, EllipticCurvePrivateKey]) -> bytes:
+    """The end-entity private key in PKCS8 PEM format, serialized once."""
+    _, ee_key = end_entity_cert
+    return ee_key.private_bytes(
+        encoding=Encoding.PEM,
+        format=PrivateFormat.PKCS8,
+        encryption_algorithm=NoEncryption(),
+    )
+
+
+@pytest.fixture(scope="session")
+def x5c_pem_certs(
+    intermediate_ca_cert: tuple[Certificate, EllipticCurvePrivateKey],
+    end_entity_cert: tuple[Certificate, EllipticCurvePrivateKey],
+) -> list[str]:
+    """The end-entity and intermediate certs in PEM format, for the legacy x5c header."""
+    intermediate_cert, _ = intermediate_ca_cert
+    ee_cert, _ = end_entity_cert
+    return [
+        ee_cert.public_bytes(Encoding.PEM).decode("utf-8"),
+        intermediate_cert.public_bytes(Encoding.PEM).decode("utf-8"),
+    ]
+
+
 @pytest.fixture(scope="session")
 def cert_chain(
     intermediate_ca_cert: tuple[Certificate, EllipticCurvePrivateKey],
@@ -173,6 +230,41 @@ def cert_chain(
     return chain
 
 
+@pytest.fixture(scope="session")
+def signed_index_jwt(
+    image_descriptor: ImageIndex.Descriptor,
+    cert_chain: X5cX509CertChain,
+    ee_key_pem: bytes,
+) -> str:
+    """An index.jwt for <image_descriptor>, signed once with the test cert chain."""
+    return compose_index_jwt(
+        image_descriptor, sign_cert_chain=cert_chain, sign_key=ee_key_pem
+    )
+
+
+@pytest.fixture(scope="session")
+def wrong_cert_chain(spare_ecdsa_key: EllipticCurvePrivateKey) -> X5cX509CertChain:
+    """A self-issued cert chain unrelated to the test cert chain."""
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(
+            x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "Different Cert")])
+        )
+        .issuer_name(
+            x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "Different CA")])
+        )
+        .public_key(spare_ecdsa_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(datetime.now(timezone.utc))
+        .not_valid_after(datetime.now(timezone.utc) + timedelta(days=90))
+        .sign(spare_ecdsa_key, hashes.SHA256())
+    )
+
+    chain = X5cX509CertChain()
+    chain.add_ee(cert)
+    return chain
+
+
 @pytest.fixture(scope="session")
 def image_descriptor() -> ImageIndex.Descriptor:
     """Create a sample image descriptor."""
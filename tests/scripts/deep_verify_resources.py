@@ -2,13 +2,15 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import os
+import sys
 import threading
-from collections import deque
 from concurrent.futures import Future, ThreadPoolExecutor
 from functools import partial
-from hashlib import sha256
 from pathlib import Path
+from typing import Generator
 
 import zstandard
 
@@ -19,49 +21,67 @@ from ota_image_libs.v1.resource_table.schema import ResourceTableManifest
 
 IMAGE_ROOT = "test_image_root/ota_image"
 WD = "test_ft"
+READ_SIZE = 8 * 1024**2
+# resources up to this size are decompressed in one shot if the size is known
+ONE_SHOT_MAX_SIZE = 64 * 1024**2
+
+if sys.version_info >= (3, 9):
+    # NOTE: the digest is only for integrity checking, not for security
+    sha256 = partial(hashlib.sha256, usedforsecurity=False)
+else:
+    sha256 = hashlib.sha256
 
 
 class ChainedFilesIO:
+    """Read through the slices as one file.
+
+    All the slices are opened once, and read with os.preadv directly into
+        the caller's buffer across the slices' boundaries.
+    """
+
     def __init__(self, slices: list[Path]) -> None:
         self._slices = slices
-        self._opened = False
-        self._cur_fd = None
+        self._fds: list[tuple[int, int]] = []
+        self._idx = 0
+        self._offset = 0
 
     def __enter__(self):
-        self._opened_fd = deque([open(_s, "rb") for _s in self._slices])
-        self._opened = True
+        for _s in self._slices:
+            _fd = os.open(_s, os.O_RDONLY | os.O_CLOEXEC)
+            self._fds.append((_fd, os.fstat(_fd).st_size))
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self._opened:
-            for _fd in self._opened_fd:
-                _fd.close()
-            self._opened = False
-            self._opened_fd.clear()
+        for _fd, _ in self._fds:
+            os.close(_fd)
+        self._fds.clear()
         return False
 
-    def read(self, size: int) -> bytes:
-        if not self._opened:
-            raise ValueError
-
-        if self._cur_fd is None:
-            self._cur_fd = self._opened_fd.popleft()
-        _read = self._cur_fd.read(size)
-        if len(_read) > 0:
-            return _read
-
-        self._cur_fd.close()
-        if not self._opened_fd:
-            return b""
-
-        self._cur_fd = self._opened_fd.popleft()
-        return self._cur_fd.read(size)
+    def readinto(self, buf) -> int:
+        _view = memoryview(buf).cast("B")
+        _buf_size, _filled = len(_view), 0
+        while _filled < _buf_size and self._idx < len(self._fds):
+            _fd, _size = self._fds[self._idx]
+            _want = min(_buf_size - _filled, _size - self._offset)
+            _read = 0
+            if _want > 0:
+                _read = os.preadv(_fd, [_view[_filled : _filled + _want]], self._offset)
+            if _read == 0:  # EOF of current slice
+                self._idx, self._offset = self._idx + 1, 0
+                continue
+            self._offset += _read
+            _filled += _read
+        return _filled
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = sum(_size for _, _size in self._fds[self._idx :]) - self._offset
+        _buf = bytearray(size)
+        return bytes(_buf[: self.readinto(_buf)])
 
 
 class DHelper:
-    def __init__(self, orm, resource_dir: Path) -> None:
-        self._orm = orm
-        self._resource_dir = resource_dir
+    def __init__(self) -> None:
         self._thread_local = threading.local()
 
     @property
@@ -73,55 +93,81 @@ class DHelper:
             self._thread_local.dctx = dctx
             return dctx
 
-    def _do_decompression_at_thread(self, item: ResourceTableManifest):
-        filter_applied = item.filter_applied
-        assert isinstance(filter_applied, CompressFilter)
-
-        compressed_entry: ResourceTableManifest = self._orm.orm_select_entry(
-            resource_id=filter_applied.resource_id
-        )
-        _filter_applied = compressed_entry.filter_applied
-        if _filter_applied is None:
-            try:
-                hasher = sha256()
-                with open(
-                    self._resource_dir / compressed_entry.digest.hex(), "rb"
-                ) as src_f:
-                    for chunk in self._dctx.read_to_iter(src_f, read_size=8 * 1024**2):
-                        hasher.update(chunk)
-                cal_digest = hasher.digest()
-                if cal_digest != item.digest:
-                    print(
-                        f"ERR: {item=} found mismatch: decompressed {cal_digest.hex()=}, expected {item.digest.hex()=}"
-                    )
-            except Exception as e:
-                logging.error(f"ERR: {item=} {compressed_entry=}: {e}", exc_info=e)
-        elif isinstance(_filter_applied, SliceFilter):  # sliced
-            try:
-                _slice_files = []
-                for _sid in _filter_applied.list_resource_id():
-                    _s_entry: ResourceTableManifest = self._orm.orm_select_entry(
-                        resource_id=_sid
-                    )
-                    assert _s_entry.filter_applied is None, "???"
-                    _slice_files.append(self._resource_dir / _s_entry.digest.hex())
-
-                hasher = sha256()
-                with ChainedFilesIO(_slice_files) as _chain_fio:
-                    for chunk in self._dctx.read_to_iter(
-                        _chain_fio, read_size=8 * 1024**2
-                    ):
-                        hasher.update(chunk)
-                cal_digest = hasher.digest()
-                if cal_digest != item.digest:
-                    print(
-                        f"(sliced) ERR: {item=} found mismatch: decompressed {cal_digest.hex()=}, expected {item.digest.hex()=}"
-                    )
-                    print(f"{len(_filter_applied.list_resource_id())=}")
-            except Exception as e:
-                logging.error(
-                    f"(sliced) ERR: {item=} {compressed_entry=}: {e}", exc_info=e
+    @property
+    def _buffer(self) -> memoryview:
+        try:
+            return self._thread_local.buffer
+        except AttributeError:
+            buffer = memoryview(bytearray(READ_SIZE))
+            self._thread_local.buffer = buffer
+            return buffer
+
+    def _decompress_and_hash(self, src, expected_size: int) -> bytes:
+        """Decompress <src> and hash the decompressed data.
+
+        If the <expected_size> is small and recorded in the zstd frame header,
+            decompress in one shot. Otherwise, decompress into the per-thread buffer,
+            and hash it in place.
+        """
+        if expected_size <= ONE_SHOT_MAX_SIZE:
+            src = src.read()
+            # NOTE: one-shot decompress only handles the first frame, ensure the
+            #       first frame contains the whole resource.
+            if zstandard.frame_content_size(src) == expected_size:
+                return sha256(self._dctx.decompress(src)).digest()
+
+        hasher, _view = sha256(), self._buffer
+        with self._dctx.stream_reader(src, read_size=READ_SIZE, closefd=False) as _r:
+            while _read := _r.readinto(_view):
+                hasher.update(_view[:_read])
+        return hasher.digest()
+
+    def _do_decompression_at_thread(
+        self, item: ResourceTableManifest, src_fpaths: list[Path]
+    ):
+        """Verify the compressed <item> with its compressed blob or the blob's slices."""
+        _sliced = len(src_fpaths) > 1
+        _prefix = "(sliced) " if _sliced else ""
+        try:
+            with ChainedFilesIO(src_fpaths) as _src:
+                cal_digest = self._decompress_and_hash(_src, item.size)
+            if cal_digest != item.digest:
+                print(
+                    f"{_prefix}ERR: {item=} found mismatch: decompressed {cal_digest.hex()=}, expected {item.digest.hex()=}"
                 )
+                if _sliced:
+                    print(f"{len(src_fpaths)=}")
+        except Exception as e:
+            logging.error(f"{_prefix}ERR: {item=} {src_fpaths=}: {e}", exc_info=e)
+
+
+def _iter_compressed_with_src(
+    db_helper: ResourceTableDBHelper, resource_dir: Path
+) -> Generator[tuple[ResourceTableManifest, list[Path]]]:
+    """Yield each compressed resource with the paths of its compressed blob(or slices).
+
+    The whole resource_table is scanned once, instead of querying the compressed
+        blob and the slices per compressed resource.
+    """
+    _blobs: dict[int, Path] = {}
+    _sliced: dict[int, list[int]] = {}
+    _compressed: list[ResourceTableManifest] = []
+    for item in db_helper.iter_all_with_shuffle(batch_size=1024):
+        _filter_applied = item.filter_applied
+        if _filter_applied is None:
+            _blobs[item.resource_id] = resource_dir / item.digest.hex()
+        elif isinstance(_filter_applied, SliceFilter):
+            _sliced[item.resource_id] = _filter_applied.list_resource_id()
+        elif isinstance(_filter_applied, CompressFilter):
+            _compressed.append(item)
+
+    for item in _compressed:
+        assert isinstance(item.filter_applied, CompressFilter)
+        _rs_id = item.filter_applied.resource_id
+        if (_slices := _sliced.get(_rs_id)) is not None:
+            yield item, [_blobs[_sid] for _sid in _slices]
+        else:
+            yield item, [_blobs[_rs_id]]
 
 
 def _cb(se, fut: Future):
@@ -143,26 +189,23 @@ def main():
     )
 
     _db_helper = ResourceTableDBHelper(rst_dbf)
-    rst_orm_pool = _db_helper.get_orm_pool(3)
-    _helper = DHelper(
-        rst_orm_pool,
-        image_resource_dir,
-    )
+    _helper = DHelper()
 
-    se = threading.Semaphore(64)
+    se = threading.BoundedSemaphore(64)
     _pcb = partial(_cb, se)
 
     with ThreadPoolExecutor(max_workers=6) as pool:
         _count = 0
-        for item in _db_helper.iter_all_with_shuffle(batch_size=1024):
-            if isinstance(item.filter_applied, CompressFilter):
-                _count += 1
-                if _count % 10000 == 0:
-                    print(f"{_count} compressed files are processed ...")
-                se.acquire()
-                pool.submit(
-                    _helper._do_decompression_at_thread, item
-                ).add_done_callback(_pcb)
+        for item, src_fpaths in _iter_compressed_with_src(
+            _db_helper, image_resource_dir
+        ):
+            _count += 1
+            if _count % 10000 == 0:
+                print(f"{_count} compressed files are processed ...")
+            se.acquire()
+            pool.submit(
+                _helper._do_decompression_at_thread, item, src_fpaths
+            ).add_done_callback(_pcb)
         print(f"a total {_count} of compressed resources are verified")
 
 
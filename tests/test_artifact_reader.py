@@ -13,14 +13,21 @@
 # limitations under the License.
 """Tests for OTA image artifact reader module."""
 
+import errno
+import hashlib
 import json
-from hashlib import sha256
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from zipfile import ZipFile
+from typing import Callable
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
 import pytest
 
 from ota_image_libs.v1.artifact.reader import OTAImageArtifactReader
+from ota_image_libs.v1.image_index.schema import ImageIndex
 from ota_image_libs.v1.image_manifest.schema import (
     ImageIdentifier,
     ImageManifest,
@@ -28,16 +35,62 @@ from ota_image_libs.v1.image_manifest.schema import (
 )
 from ota_image_libs.v1.media_types import IMAGE_INDEX
 
+if sys.version_info >= (3, 9):
+    # NOTE: the digests are only for integrity checking, not for security
+    sha256 = partial(hashlib.sha256, usedforsecurity=False)
+else:
+    sha256 = hashlib.sha256
 
-@pytest.fixture
+
+@pytest.fixture(scope="module")
 def reader():
-    """Create an OTAImageArtifactReader instance."""
+    """Create an OTAImageArtifactReader instance shared by the tests in this module."""
     with OTAImageArtifactReader(
         Path(__file__).parent / "data" / "ota-image.zip"
     ) as reader:
         yield reader
 
 
+@pytest.fixture(scope="module")
+def parsed_index(reader: OTAImageArtifactReader) -> ImageIndex:
+    """The image index of the test OTA image, parsed once for this module."""
+    return reader.parse_index()
+
+
+@pytest.fixture(scope="module")
+def cached_blob_text(reader: OTAImageArtifactReader) -> Callable[[str], str]:
+    """Read blob as text by digest, with the result cached for this module.
+
+    For tests that only use the blob contents, not testing the reading itself.
+    """
+    return lru_cache(maxsize=64)(reader.read_blob_as_text)
+
+
+@pytest.fixture(scope="module")
+def first_manifest(
+    parsed_index: ImageIndex, cached_blob_text: Callable[[str], str]
+) -> ImageManifest:
+    """The image manifest of the first image payload, parsed once for this module."""
+    return ImageManifest.parse_metafile(
+        cached_blob_text(parsed_index.manifests[0].digest.digest_hex)
+    )
+
+
+@pytest.fixture(scope="session")
+def no_resource_table_zip(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """An artifact with a minimal index without resource_table."""
+    invalid_zip = tmp_path_factory.mktemp("fx") / "no_resource_table.zip"
+    with ZipFile(invalid_zip, mode="w", compression=ZIP_STORED) as zf:
+        minimal_index = {
+            "schemaVersion": 2,
+            "mediaType": "application/vnd.oci.image.index.v1+json",
+            "manifests": [],
+            "annotations": {"vnd.tier4.ota.ota-image-builder.version": "test-1.0.0"},
+        }
+        zf.writestr("index.json", json.dumps(minimal_index))
+    return invalid_zip
+
+
 class TestOTAImageArtifactReaderValidation:
     """Tests for image validation."""
 
@@ -49,16 +102,16 @@ class TestOTAImageArtifactReaderValidation:
         """Test is_valid_image returns False for invalid archive."""
         # Create a zip file without index.json
         invalid_zip = tmp_path / "invalid.zip"
-        with ZipFile(invalid_zip, mode="w") as zf:
+        with ZipFile(invalid_zip, mode="w", compression=ZIP_STORED) as zf:
             zf.writestr("dummy.txt", "not an OTA image")
 
         with OTAImageArtifactReader(invalid_zip) as reader:
             assert reader.is_valid_image() is False
 
 
-def test_parse_index(reader: OTAImageArtifactReader):
+def test_parse_index(reader: OTAImageArtifactReader, parsed_index: ImageIndex):
     """Test parsing the image index."""
-    index = reader.parse_index()
+    index = parsed_index
     assert index.schemaVersion == 2
     assert index.mediaType == IMAGE_INDEX
     assert len(index.manifests) > 0
@@ -79,83 +132,153 @@ class TestOTAImageArtifactReaderBlobs:
         with pytest.raises(FileNotFoundError, match="blob with sha256_digest"):
             reader.open_blob(fake_digest)
 
-    def test_read_blob(self, reader: OTAImageArtifactReader):
+    def test_has_blob(self, reader: OTAImageArtifactReader, parsed_index: ImageIndex):
+        """Test checking the presence of a blob."""
+        digest = parsed_index.manifests[0].digest.digest_hex
+
+        assert reader.has_blob(digest) is True
+        assert reader.has_blob("0" * 64) is False
+
+    def test_open_blob_region(
+        self, reader: OTAImageArtifactReader, parsed_index: ImageIndex
+    ):
+        """Test locating the data region of a blob in the artifact file."""
+        digest = parsed_index.manifests[0].digest.digest_hex
+
+        _region = reader.open_blob_region(digest)
+        assert _region is not None
+        _fd, _offset, _size = _region
+        assert os.pread(_fd, _size, _offset) == reader.read_blob(digest)
+
+        with pytest.raises(FileNotFoundError):
+            reader.open_blob_region("0" * 64)
+
+    def test_iter_blobs_info(
+        self, reader: OTAImageArtifactReader, parsed_index: ImageIndex
+    ):
+        """Test iterating through the blobs, and opening blob by its ZipInfo."""
+        _blobs_info = dict(reader.iter_blobs_info())
+        digest = parsed_index.manifests[0].digest.digest_hex
+        assert bytes.fromhex(digest) in _blobs_info
+
+        for _digest, _zinfo in _blobs_info.items():
+            with reader.open_blob_by_info(_zinfo) as _blob:
+                assert sha256(_blob.read()).digest() == _digest
+
+    def test_blob_view_by_info(self, reader: OTAImageArtifactReader):
+        """Test getting zero-copy view of blobs from the memory-mapped archive."""
+        for _digest, _zinfo in reader.iter_blobs_info():
+            _view = reader.blob_view_by_info(_zinfo)
+            assert _view is not None
+            with _view:
+                assert _view.readonly
+                assert sha256(_view).digest() == _digest
+
+    def test_blob_view_by_info_mmap_failed(self, test_artifact: Path, mocker):
+        """Test that no view is returned, and mmap is not retried if mmap failed."""
+        mmap_mock = mocker.patch(
+            "ota_image_libs.v1.artifact.reader.mmap.mmap",
+            side_effect=OSError(errno.ENOMEM, "injected mmap failure"),
+        )
+        with OTAImageArtifactReader(test_artifact) as reader:
+            for _digest, _zinfo in reader.iter_blobs_info():
+                assert reader.blob_view_by_info(_zinfo) is None
+                # the blob can still be read by streaming
+                with reader.open_blob_by_info(_zinfo) as _blob:
+                    assert sha256(_blob.read()).digest() == _digest
+        mmap_mock.assert_called_once()
+
+    def test_open_blob_region_compressed(self, tmp_path: Path):
+        """Test that compressed blob cannot be read directly."""
+        _data = b"compressed blob" * 100
+        _digest = sha256(_data).hexdigest()
+        archive = tmp_path / "compressed.zip"
+        with ZipFile(archive, mode="w", compression=ZIP_DEFLATED) as zf:
+            zf.writestr(f"blobs/sha256/{_digest}", _data)
+
+        with OTAImageArtifactReader(archive) as reader:
+            assert reader.open_blob_region(_digest) is None
+            assert reader.blob_view_by_info(reader.get_blob_info(_digest)) is None
+            assert reader.read_blob(_digest) == _data
+
+    def test_read_blob(self, reader: OTAImageArtifactReader, parsed_index: ImageIndex):
         """Test reading a blob as bytes."""
-        index = reader.parse_index()
-        manifest_descriptor = index.manifests[0]
-        digest = manifest_descriptor.digest.digest_hex
+        digest = parsed_index.manifests[0].digest.digest_hex
 
         data = reader.read_blob(digest)
         assert sha256(data).hexdigest() == digest
 
-    def test_read_blob_as_text(self, reader: OTAImageArtifactReader):
+    def test_read_blob_as_text(
+        self, reader: OTAImageArtifactReader, parsed_index: ImageIndex
+    ):
         """Test reading a blob as text."""
-        index = reader.parse_index()
-        manifest_descriptor = index.manifests[0]
-        digest = manifest_descriptor.digest.digest_hex
+        digest = parsed_index.manifests[0].digest.digest_hex
 
         text = reader.read_blob_as_text(digest)
-        assert sha256(text.encode()).hexdigest() == digest
-
-    def test_stream_blob(self, reader: OTAImageArtifactReader):
+        # NOTE: check the text against the raw blob bytes, which are verified by
+        #       hashing, instead of re-encoding the text for hashing.
+        raw = reader.blob_view_by_info(reader.get_blob_info(digest))
+        assert raw is not None
+        with raw:
+            assert sha256(raw).hexdigest() == digest
+            assert text == str(raw, "utf-8")
+
+    def test_stream_blob(
+        self, reader: OTAImageArtifactReader, parsed_index: ImageIndex
+    ):
         """Test streaming a blob with default chunk size."""
-        index = reader.parse_index()
-        manifest_descriptor = index.manifests[0]
-        digest = manifest_descriptor.digest.digest_hex
+        digest = parsed_index.manifests[0].digest.digest_hex
 
-        data = b"".join(reader.stream_blob(digest))
-        assert sha256(data).hexdigest() == digest
+        # NOTE: hash the chunks incrementally, without joining the whole blob
+        hasher = sha256()
+        for chunk in reader.stream_blob(digest):
+            hasher.update(chunk)
+        assert hasher.hexdigest() == digest
 
 
 class TestOTAImageArtifactReaderImagePayload:
     """Tests for image payload selection."""
 
-    def test_select_image_payload(self, reader: OTAImageArtifactReader):
+    def test_select_image_payload(
+        self,
+        reader: OTAImageArtifactReader,
+        parsed_index: ImageIndex,
+        first_image_id: ImageIdentifier,
+    ):
         """Test selecting an image payload."""
-        index = reader.parse_index()
-
-        # Get the first manifest's image identifier
-        first_manifest_descriptor = index.manifests[0]
-        first_manifest = ImageManifest.parse_metafile(
-            reader.read_blob_as_text(first_manifest_descriptor.digest.digest_hex)
-        )
-        image_id = first_manifest.image_identifier
-
-        # Select the payload
-        manifest = reader.select_image_payload(image_id, index)
+        image_id = first_image_id
+        manifest = reader.select_image_payload(image_id, parsed_index)
         assert manifest is not None
         assert manifest.image_identifier == image_id
 
-    def test_select_image_payload_not_found(self, reader: OTAImageArtifactReader):
+    def test_select_image_payload_not_found(
+        self, reader: OTAImageArtifactReader, parsed_index: ImageIndex
+    ):
         """Test selecting a non-existent image payload returns None."""
-        index = reader.parse_index()
         fake_id = ImageIdentifier("nonexistent_ecu", OTAReleaseKey.dev)
 
-        manifest = reader.select_image_payload(fake_id, index)
+        manifest = reader.select_image_payload(fake_id, parsed_index)
         assert manifest is None
 
 
-def test_get_image_config(reader: OTAImageArtifactReader):
+def test_get_image_config(
+    reader: OTAImageArtifactReader, first_manifest: ImageManifest
+):
     """Test getting image configuration."""
-    index = reader.parse_index()
-    manifest_descriptor = index.manifests[0]
-    manifest = ImageManifest.parse_metafile(
-        reader.read_blob_as_text(manifest_descriptor.digest.digest_hex)
-    )
-    reader.get_image_config(manifest)
+    reader.get_image_config(first_manifest)
 
 
 class TestOTAImageArtifactReaderTables:
     """Tests for file table and resource table operations."""
 
-    def test_get_file_table(self, reader: OTAImageArtifactReader, tmp_path: Path):
+    def test_get_file_table(
+        self,
+        reader: OTAImageArtifactReader,
+        first_manifest: ImageManifest,
+        tmp_path: Path,
+    ):
         """Test extracting file table."""
-        index = reader.parse_index()
-        manifest_descriptor = index.manifests[0]
-        manifest = ImageManifest.parse_metafile(
-            reader.read_blob_as_text(manifest_descriptor.digest.digest_hex)
-        )
-        image_config, _ = reader.get_image_config(manifest)
+        image_config, _ = reader.get_image_config(first_manifest)
 
         save_dst = tmp_path / "file_table.db"
         result = reader.get_file_table(image_config, save_dst)
@@ -163,33 +286,21 @@ class TestOTAImageArtifactReaderTables:
         assert result.exists()
         assert result.stat().st_size > 0
 
-    def test_get_resource_table(self, reader: OTAImageArtifactReader, tmp_path: Path):
+    def test_get_resource_table(
+        self, reader: OTAImageArtifactReader, parsed_index: ImageIndex, tmp_path: Path
+    ):
         """Test extracting resource table."""
-        index = reader.parse_index()
-
         save_dst = tmp_path / "resource_table.db"
-        result = reader.get_resource_table(index, save_dst)
+        result = reader.get_resource_table(parsed_index, save_dst)
 
         assert result.exists()
         assert result.stat().st_size > 0
 
-    def test_get_resource_table_not_found(self, tmp_path: Path):
+    def test_get_resource_table_not_found(
+        self, no_resource_table_zip: Path, tmp_path: Path
+    ):
         """Test get_resource_table raises ValueError when table is missing."""
-        # Create a minimal index without resource table
-        invalid_zip = tmp_path / "no_resource_table.zip"
-        with ZipFile(invalid_zip, mode="w") as zf:
-            # Create a minimal index without resource_table
-            minimal_index = {
-                "schemaVersion": 2,
-                "mediaType": "application/vnd.oci.image.index.v1+json",
-                "manifests": [],
-                "annotations": {
-                    "vnd.tier4.ota.ota-image-builder.version": "test-1.0.0"
-                },
-            }
-            zf.writestr("index.json", json.dumps(minimal_index))
-
-        with OTAImageArtifactReader(invalid_zip) as reader:
+        with OTAImageArtifactReader(no_resource_table_zip) as reader:
             index = reader.parse_index()
             save_dst = tmp_path / "resource_table.db"
             with pytest.raises(ValueError, match="invalid OTA image"):
@@ -199,16 +310,16 @@ class TestOTAImageArtifactReaderTables:
 class TestOTAImageArtifactReaderIntegration:
     """Integration tests using the full workflow."""
 
-    def test_complete_workflow(self, reader: OTAImageArtifactReader, tmp_path: Path):
+    def test_complete_workflow(
+        self,
+        reader: OTAImageArtifactReader,
+        parsed_index: ImageIndex,
+        first_image_id: ImageIdentifier,
+        tmp_path: Path,
+    ):
         """Test complete workflow from index to extracting tables."""
-        index = reader.parse_index()
-        assert index is not None
-
-        first_manifest_descriptor = index.manifests[0]
-        first_manifest = ImageManifest.parse_metafile(
-            reader.read_blob_as_text(first_manifest_descriptor.digest.digest_hex)
-        )
-        image_id = first_manifest.image_identifier
+        index = parsed_index
+        image_id = first_image_id
 
         manifest = reader.select_image_payload(image_id, index)
         assert manifest is not None
@@ -224,16 +335,27 @@ class TestOTAImageArtifactReaderIntegration:
         result_rt = reader.get_resource_table(index, resource_table_path)
         assert result_rt.exists()
 
-    def test_multiple_image_payloads(self, reader: OTAImageArtifactReader):
+    def test_multiple_image_payloads(
+        self,
+        reader: OTAImageArtifactReader,
+        parsed_index: ImageIndex,
+        cached_blob_text: Callable[[str], str],
+    ):
         """Test handling multiple image payloads if present."""
-        index = reader.parse_index()
-        for manifest_descriptor in index.manifests:
-            if isinstance(manifest_descriptor, ImageManifest.Descriptor):
-                manifest = ImageManifest.parse_metafile(
-                    reader.read_blob_as_text(manifest_descriptor.digest.digest_hex)
-                )
-
-                image_id = manifest.image_identifier
-                manifest = reader.select_image_payload(image_id, index)
-                assert manifest is not None
-                assert manifest.image_identifier == image_id
+        index = parsed_index
+        digests = [
+            manifest_descriptor.digest.digest_hex
+            for manifest_descriptor in index.manifests
+            if isinstance(manifest_descriptor, ImageManifest.Descriptor)
+        ]
+        # NOTE: the manifests are independent, read them concurrently
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            manifests_text = list(pool.map(cached_blob_text, digests))
+
+        for manifest_text in manifests_text:
+            manifest = ImageManifest.parse_metafile(manifest_text)
+
+            image_id = manifest.image_identifier
+            manifest = reader.select_image_payload(image_id, index)
+            assert manifest is not None
+            assert manifest.image_identifier == image_id
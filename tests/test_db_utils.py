@@ -13,7 +13,17 @@
 # limitations under the License.
 """Test database utilities."""
 
-from ota_image_libs.common.db_utils import count_blobs_in_dir
+import os
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from ota_image_libs.common.db_utils import (
+    count_blobs_in_dir,
+    enable_query_only,
+    iter_cursor_in_batch,
+)
 
 
 class TestDBUtils:
@@ -27,11 +37,43 @@ class TestDBUtils:
 
     def test_count_blobs_in_dir_with_multiple_files(self, tmp_path):
         """Test counting multiple blobs."""
-        # Create multiple test files
+        # Create multiple test files, with the data sliced from one buffer
+        buf = b"x" * 500
         for i in range(5):
-            (tmp_path / f"blob{i}.dat").write_bytes(b"x" * (i + 1) * 100)
+            fd = os.open(
+                tmp_path / f"blob{i}.dat", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644
+            )
+            try:
+                os.write(fd, buf[: (i + 1) * 100])
+            finally:
+                os.close(fd)
 
         count, size = count_blobs_in_dir(tmp_path)
 
         assert count == 5
         assert size == sum((i + 1) * 100 for i in range(5))
+
+    @pytest.mark.parametrize("batch_size", (1, 7, 100, 1000))
+    def test_iter_cursor_in_batch(self, batch_size):
+        """Test that all rows are yielded in order regardless of the batch size."""
+        with closing(sqlite3.connect(":memory:")) as con:
+            con.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+            con.executemany("INSERT INTO t VALUES (?)", ((i,) for i in range(100)))
+
+            _cur = con.execute("SELECT id FROM t ORDER BY id")
+            result = list(iter_cursor_in_batch(_cur, batch_size=batch_size))
+
+        assert result == [(i,) for i in range(100)]
+
+    def test_enable_query_only(self, tmp_path):
+        """Test that write is rejected on query_only connection."""
+        db_f = tmp_path / "test.sqlite3"
+        with closing(sqlite3.connect(db_f)) as con:
+            with con:
+                con.execute("CREATE TABLE t (id INTEGER PRIMARY KEY)")
+
+        with closing(sqlite3.connect(db_f)) as con:
+            enable_query_only(con)
+            assert con.execute("PRAGMA query_only").fetchone() == (1,)
+            with pytest.raises(sqlite3.OperationalError):
+                con.execute("INSERT INTO t VALUES (1)")
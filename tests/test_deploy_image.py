@@ -15,28 +15,42 @@
 
 from __future__ import annotations
 
+import errno
 import os
-from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
 from pathlib import Path
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
 import pytest
+import zstandard
 from pytest_mock import MockerFixture
 
 from ota_image_libs.v1.artifact.reader import OTAImageArtifactReader
+from ota_image_libs.v1.consts import RESOURCE_DIR
+from ota_image_libs.v1.file_table.db import DirRow, FileTableDBHelper
+from ota_image_libs.v1.file_table.utils import PrepareEntryFailed
 from ota_image_libs.v1.image_manifest.schema import (
     ImageIdentifier,
-    ImageManifest,
     OTAReleaseKey,
 )
 from ota_image_tools.libs.deploy_image import (
+    MAX_READ_SIZE,
     READ_SIZE,
+    SMALL_RESOURCE_SIZE,
+    SMALL_RESOURCES_BATCH_SIZE,
+    DeployResourcesFailed,
     OTAImageDeployerSetup,
     ResourcesDeployer,
     RootfsDeployer,
+    SetupRootfsFailed,
     SetupWorkDirFailed,
+    get_optimal_read_size,
+    open_resource_dst,
 )
 
 LIBS_DEPLOY_IMAGE = "ota_image_tools.libs.deploy_image"
+LIBS_FILE_TABLE_UTILS = "ota_image_libs.v1.file_table.utils"
 
 
 @pytest.fixture
@@ -71,23 +85,6 @@ def tmp_download_dir(tmp_path: Path) -> Path:
     return td
 
 
-@pytest.fixture
-def one_image_id(test_artifact) -> ImageIdentifier:
-    """Get a valid ImageIdentifier from the test artifact.
-
-    This reads the test OTA image to find the first valid image manifest.
-    """
-    with OTAImageArtifactReader(test_artifact) as reader:
-        image_index = reader.parse_index()
-        for entry in image_index.manifests:
-            if isinstance(entry, ImageManifest.Descriptor):
-                manifest = ImageManifest.parse_metafile(
-                    reader.read_blob_as_text(entry.digest.digest_hex)
-                )
-                return manifest.image_identifier
-    raise ValueError("invalid test data!")
-
-
 class TestOTAImageDeployerSetup:
     """Tests for OTAImageDeployerSetup class."""
 
@@ -118,55 +115,557 @@ class TestOTAImageDeployerSetup:
             OTAImageDeployerSetup(image_id, artifact=nonexistent, workdir=workdir)
 
 
-def test_worker_cb_sets_failed_flag_on_exception(
-    mocker: MockerFixture, resource_dir, tmp_download_dir
+@pytest.mark.parametrize(
+    "_read_ahead_kb, _is_partition, _expected",
+    (
+        # small read-ahead, clamped to READ_SIZE
+        ("128", False, READ_SIZE),
+        # twice the read-ahead within the range
+        ("2048", False, 4 * 1024**2),
+        ("2048", True, 4 * 1024**2),
+        # large read-ahead, capped to MAX_READ_SIZE
+        ("8192", True, MAX_READ_SIZE),
+        # invalid read-ahead setting
+        ("invalid", False, READ_SIZE),
+    ),
+)
+def test_get_optimal_read_size(
+    mocker: MockerFixture, tmp_path: Path, _read_ahead_kb, _is_partition, _expected
 ):
-    """Test that _worker_cb sets failed flag on exception."""
+    """Test deriving the read size from the read-ahead setting of the device."""
+    _sysfs_disk = tmp_path / "sysfs" / "sda"
+    (_sysfs_disk / "queue").mkdir(parents=True)
+    (_sysfs_disk / "queue" / "read_ahead_kb").write_text(_read_ahead_kb)
+    _sysfs_dev = _sysfs_disk / "sda1" if _is_partition else _sysfs_disk
+    _sysfs_dev.mkdir(exist_ok=True)
+    mocker.patch(
+        f"{LIBS_DEPLOY_IMAGE}.Path",
+        return_value=mocker.MagicMock(
+            resolve=mocker.MagicMock(return_value=_sysfs_dev)
+        ),
+    )
+
+    assert get_optimal_read_size(tmp_path) == _expected
+
+
+def test_get_optimal_read_size_not_detected(tmp_path: Path):
+    """Test that READ_SIZE is used if the read-ahead cannot be detected."""
+    assert get_optimal_read_size(tmp_path / "nonexistent") == READ_SIZE
+
+
+@pytest.mark.parametrize(
+    "_expected_size, _data_size",
+    (
+        (None, 1024),
+        (SMALL_RESOURCE_SIZE, SMALL_RESOURCE_SIZE),
+        (SMALL_RESOURCE_SIZE * 4, SMALL_RESOURCE_SIZE * 4),
+        # less data than expected is written
+        (SMALL_RESOURCE_SIZE * 4, SMALL_RESOURCE_SIZE * 2),
+    ),
+)
+def test_open_resource_dst(tmp_path: Path, _expected_size, _data_size):
+    """Test that the resource file is the same as the data written into it."""
+    _data = os.urandom(_data_size)
+    _dst = tmp_path / "resource"
+    with open_resource_dst(_dst, _expected_size) as _dst_fp:
+        _dst_fp.write(_data)
+    assert _dst.read_bytes() == _data
+
+
+@pytest.mark.parametrize("_expected_size", (None, SMALL_RESOURCE_SIZE * 4))
+def test_open_resource_dst_removed_on_failure(tmp_path: Path, _expected_size):
+    """Test that the resource file is removed if writing it failed."""
+    _dst = tmp_path / "resource"
+    exc = ValueError("injected write failure")
+    with pytest.raises(ValueError) as exc_info:
+        with open_resource_dst(_dst, _expected_size) as _dst_fp:
+            _dst_fp.write(os.urandom(1024))
+            raise exc
+    assert exc_info.value is exc
+    assert not _dst.exists()
+
+
+def _mock_resources_deployer(
+    mocker: MockerFixture,
+    resource_dir,
+    tmp_download_dir,
+    _resources=(),
+    *,
+    artifact: Path | None = None,
+    blobs_info=(),
+    **kwargs,
+) -> ResourcesDeployer:
+    """Create a ResourcesDeployer with mocked workdir setup.
+
+    If <artifact> is specified, the artifact is read by actual artifact readers,
+        otherwise the readers are mocked with only <blobs_info> in the artifact.
+    """
     workdir_setup = mocker.MagicMock(spec=OTAImageDeployerSetup)
     workdir_setup._rst_db_helper = mocker.MagicMock()
-    workdir_setup._rst_db_helper.get_orm_pool = mocker.MagicMock()
+    workdir_setup.file_table_helper.select_all_digests_with_size.return_value = (
+        _resources
+    )
+    if artifact is not None:
+        workdir_setup.open_artifact.side_effect = lambda: OTAImageArtifactReader(
+            artifact
+        )
+    else:
+        # NOTE: by default no resource is stored as it, all are dispatched to
+        #       the compute pool.
+        _reader = workdir_setup.open_artifact.return_value.__enter__.return_value
+        _reader.iter_blobs_info.return_value = list(blobs_info)
 
     deployer = ResourcesDeployer(
         workdir_setup=workdir_setup,
         resource_dir=resource_dir,
         tmp_dir=tmp_download_dir,
-        workers_num=2,
-        concurrent_jobs=10,
-        read_size=READ_SIZE,
+        **{
+            "workers_num": 2,
+            "io_workers_num": 2,
+            "concurrent_jobs": 10,
+            "read_size": READ_SIZE,
+            **kwargs,
+        },
     )
+    mocker.patch.object(deployer, "_thread_worker_finalizer")
+    return deployer
+
 
-    fut = mocker.MagicMock(spec=Future)
+def test_deploy_resources_failed_on_task_exception(
+    mocker: MockerFixture, resource_dir, tmp_download_dir
+):
+    """Test that exception raised by a task fails the deployment."""
+    _resources = [(os.urandom(32), SMALL_RESOURCE_SIZE) for _ in range(10)]
+    deployer = _mock_resources_deployer(
+        mocker, resource_dir, tmp_download_dir, _resources
+    )
+    mocker.patch.object(deployer, "_thread_initializer")
     exc = ValueError("injected test failure")
-    fut.exception.return_value = exc
+    mocker.patch.object(deployer, "_prepare_one_resource_at_thread", side_effect=exc)
 
-    deployer._concurrent_se.acquire()
-    deployer._worker_cb(fut)
-    assert deployer._last_exc is exc
+    with pytest.raises(DeployResourcesFailed) as exc_info:
+        deployer.deploy_resources()
+    assert exc_info.value.__cause__ is exc
+    assert deployer._inflight_limiter.inflight == 0
 
 
-def test_deploy_image_e2e(
+def test_deploy_resources_failed_on_worker_initialize_failure(
+    mocker: MockerFixture, resource_dir, tmp_download_dir
+):
+    """Test that the dispatcher doesn't wait forever when workers failed to initialize."""
+    mocker.patch(f"{LIBS_DEPLOY_IMAGE}.DISPATCH_CHECK_INTERVAL", 0.01)
+    _resources = [(os.urandom(32), SMALL_RESOURCE_SIZE) for _ in range(10)]
+    # NOTE: only one resource can be in-flight
+    deployer = _mock_resources_deployer(
+        mocker,
+        resource_dir,
+        tmp_download_dir,
+        _resources,
+        concurrent_jobs=1,
+        inflight_bytes=SMALL_RESOURCE_SIZE,
+    )
+    exc = RuntimeError("injected initializer failure")
+    mocker.patch.object(deployer, "_thread_initializer", side_effect=exc)
+
+    with pytest.raises(DeployResourcesFailed) as exc_info:
+        deployer.deploy_resources()
+    assert exc_info.value.__cause__ is exc
+
+
+def test_prepare_direct_resource_skips_resource_table(
+    mocker: MockerFixture, test_artifact: Path, resource_dir, tmp_download_dir
+):
+    """Test that resource stored as it in the artifact is got directly."""
+    deployer = _mock_resources_deployer(
+        mocker, resource_dir, tmp_download_dir, artifact=test_artifact
+    )
+    rst_helper_mock = mocker.patch.object(deployer, "_rst_helper")
+    deployer._thread_initializer()
+
+    with OTAImageArtifactReader(test_artifact) as reader:
+        _digest_hex = reader.parse_index().manifests[0].digest.digest_hex
+        _expected = reader.read_blob(_digest_hex)
+
+    deployer._prepare_one_resource_at_thread(bytes.fromhex(_digest_hex))
+    rst_helper_mock.prepare_resource_at_thread.assert_not_called()
+    assert (resource_dir / _digest_hex).read_bytes() == _expected
+
+
+def test_deploy_resources_dispatch_small_resources_in_batch(
+    mocker: MockerFixture, resource_dir, tmp_download_dir
+):
+    """Test that small resources are batched per pool, while large ones are dispatched alone."""
+    _small_direct = [
+        (os.urandom(32), 16) for _ in range(SMALL_RESOURCES_BATCH_SIZE + 3)
+    ]
+    _small_non_direct = [(os.urandom(32), 16) for _ in range(2)]
+    _large = [(os.urandom(32), SMALL_RESOURCE_SIZE) for _ in range(2)]
+    _all = [*_small_direct, *_small_non_direct, *_large]
+    _direct_info = {_digest: mocker.MagicMock() for _digest, _ in _small_direct}
+
+    deployer = _mock_resources_deployer(
+        mocker,
+        resource_dir,
+        tmp_download_dir,
+        _all,
+        blobs_info=_direct_info.items(),
+        io_workers_num=3,
+    )
+    initializer_mock = mocker.patch.object(deployer, "_thread_initializer")
+    io_initializer_mock = mocker.patch.object(deployer, "_io_thread_initializer")
+    finalizer_mock = mocker.patch.object(deployer, "_thread_worker_finalizer")
+    prepare_direct_mock = mocker.patch.object(
+        deployer, "_prepare_direct_resources_at_thread"
+    )
+    prepare_batch_mock = mocker.patch.object(
+        deployer, "_prepare_resources_batch_at_thread"
+    )
+
+    assert deployer.deploy_resources() == (
+        len(_all),
+        sum(_size for _, _size in _all),
+    )
+    # direct resources are dispatched by ZipInfo to the IO pool
+    _direct_batches = [_call.args[0] for _call in prepare_direct_mock.call_args_list]
+    assert sorted(map(len, _direct_batches)) == [3, SMALL_RESOURCES_BATCH_SIZE]
+    assert {id(_zinfo) for _batch in _direct_batches for _zinfo in _batch} == {
+        id(_zinfo) for _zinfo in _direct_info.values()
+    }
+    # large resources are dispatched alone
+    _batches = [_call.args[0] for _call in prepare_batch_mock.call_args_list]
+    assert sorted(map(len, _batches)) == [1, 1, 2]
+    assert sorted(_digest for _batch in _batches for _digest in _batch) == sorted(
+        _digest for _digest, _ in [*_small_non_direct, *_large]
+    )
+    # IO workers use the light initializer, without the per-thread reader
+    assert initializer_mock.call_count == finalizer_mock.call_count == 2
+    assert io_initializer_mock.call_count == 3
+    # one reader for the blobs lookup, one shared by the IO workers
+    _open_artifact = deployer._workdir_setup.open_artifact
+    assert _open_artifact.return_value.__exit__.call_count == 2
+    assert deployer._inflight_limiter.inflight == 0
+
+
+@pytest.mark.parametrize(
+    "_frames, _with_origin_size",
+    (
+        (1, True),  # one-shot decompress
+        (1, False),
+        (3, True),  # multiple frames, the first frame doesn't hold the whole resource
+    ),
+)
+def test_get_resource_zstd_decompress(
     mocker: MockerFixture,
-    test_artifact: Path,
-    one_image_id,
-    workdir,
+    tmp_path: Path,
     resource_dir,
     tmp_download_dir,
-    rootfs_dir,
+    _frames,
+    _with_origin_size,
 ):
-    """Test the deployment workflow up to resource deployment.
+    """Test decompressing resources, in one shot or in streaming."""
+    _cctx = zstandard.ZstdCompressor()
+    _origin = [os.urandom(4096) for _ in range(_frames)]
+    _compressed = b"".join(_cctx.compress(_data) for _data in _origin)
+    _digest = sha256(_compressed).digest()
+
+    _artifact = tmp_path / "artifact.zip"
+    with ZipFile(_artifact, mode="w") as zf:
+        zf.writestr(f"{RESOURCE_DIR}/{_digest.hex()}", _compressed)
+
+    deployer = _mock_resources_deployer(
+        mocker, resource_dir, tmp_download_dir, artifact=_artifact
+    )
+    deployer._thread_initializer()
 
-    Note: Full rootfs deployment requires root permissions for chown/chmod.
-    This test verifies setup and resource deployment work correctly.
-    """
-    if os.geteuid() != 0:  # patch privileged operations for non-root tests
-        mocker.patch(f"{LIBS_DEPLOY_IMAGE}.prepare_dir")
-        mocker.patch(f"{LIBS_DEPLOY_IMAGE}.prepare_non_regular")
-        mocker.patch(f"{LIBS_DEPLOY_IMAGE}.prepare_regular_inlined")
-        mocker.patch(f"{LIBS_DEPLOY_IMAGE}.prepare_regular_hardlink")
-        mocker.patch(f"{LIBS_DEPLOY_IMAGE}.prepare_regular_copy")
+    _origin_data = b"".join(_origin)
+    _dst = resource_dir / "decompressed"
+    deployer._get_resource_zstd_decompress(
+        _digest, _dst, len(_origin_data) if _with_origin_size else None
+    )
+    assert _dst.read_bytes() == _origin_data
 
-    setup = OTAImageDeployerSetup(one_image_id, artifact=test_artifact, workdir=workdir)
 
+@pytest.mark.parametrize("_compress_type", (ZIP_STORED, ZIP_DEFLATED))
+def test_get_resource_at_io_thread(
+    mocker: MockerFixture,
+    tmp_path: Path,
+    resource_dir,
+    tmp_download_dir,
+    _compress_type,
+):
+    """Test that IO workers get resources with the shared artifact reader."""
+    _data = os.urandom(4096)
+    _digest_hex = sha256(_data).hexdigest()
+    _artifact = tmp_path / "artifact.zip"
+    with ZipFile(_artifact, mode="w", compression=_compress_type) as zf:
+        zf.writestr(f"{RESOURCE_DIR}/{_digest_hex}", _data)
+
+    deployer = _mock_resources_deployer(
+        mocker, resource_dir, tmp_download_dir, artifact=_artifact
+    )
+    with OTAImageArtifactReader(_artifact) as _shared_reader:
+        deployer._io_artifact_reader = _shared_reader
+        deployer._io_thread_initializer()
+        assert deployer._thread_local.artifact_reader is _shared_reader
+        assert not hasattr(deployer._thread_local, "decompress_view")
+
+        deployer._prepare_direct_resources_at_thread(
+            [deployer._get_blob_info(bytes.fromhex(_digest_hex))]
+        )
+    assert (resource_dir / _digest_hex).read_bytes() == _data
+    # the copy buffer is only allocated when the blob cannot be copied as it
+    assert hasattr(deployer._thread_local, "decompress_view") == (
+        _compress_type != ZIP_STORED
+    )
+
+
+def test_get_resource_truncated_blob(
+    mocker: MockerFixture, tmp_path: Path, resource_dir, tmp_download_dir
+):
+    """Test that no resource is left behind if the blob is truncated in the artifact."""
+    _data = os.urandom(SMALL_RESOURCE_SIZE * 4)
+    _digest_hex = sha256(_data).hexdigest()
+    _artifact = tmp_path / "artifact.zip"
+    with ZipFile(_artifact, mode="w") as zf:
+        zf.writestr(f"{RESOURCE_DIR}/{_digest_hex}", _data)
+
+    deployer = _mock_resources_deployer(
+        mocker, resource_dir, tmp_download_dir, artifact=_artifact
+    )
+    deployer._thread_initializer()
+    mocker.patch(f"{LIBS_DEPLOY_IMAGE}.copy_fd_region", return_value=len(_data) // 2)
+
+    _dst = resource_dir / _digest_hex
+    with pytest.raises(ValueError, match="truncated"):
+        deployer._get_resource(
+            deployer._get_blob_info(bytes.fromhex(_digest_hex)), _dst
+        )
+    assert not _dst.exists()
+
+
+def test_process_dir_entries_parent_before_child(
+    mocker: MockerFixture, resource_dir, rootfs_dir
+):
+    """Test that dirs are grouped by top-level, and parents prepared before children."""
+    _dirs = ["/usr/lib/a", "/", "/etc", "/usr", "/usr/lib", "/etc/b"]
+    ft_helper = mocker.MagicMock(spec=FileTableDBHelper)
+    ft_helper.iter_dir_entries.return_value = [
+        DirRow(path=_path, uid=0, gid=0, mode=0o40755) for _path in _dirs
+    ]
+    prepared: list[str] = []
+    mocker.patch(
+        f"{LIBS_FILE_TABLE_UTILS}.prepare_dir",
+        side_effect=lambda entry, **_: prepared.append(entry.path),
+    )
+
+    RootfsDeployer(
+        file_table_db_helper=ft_helper,
+        rootfs_dir=rootfs_dir,
+        resource_dir=resource_dir,
+        max_workers=2,
+        concurrent_tasks=10,
+    )._process_dir_entries()
+
+    assert sorted(prepared) == sorted(_dirs)
+    assert prepared[0] == "/"
+    for _parent, _child in (("/usr", "/usr/lib"), ("/usr/lib", "/usr/lib/a")):
+        assert prepared.index(_parent) < prepared.index(_child)
+    assert prepared.index("/etc") < prepared.index("/etc/b")
+
+
+def test_process_dir_entries_failure(mocker: MockerFixture, resource_dir, rootfs_dir):
+    """Test that failure at dir worker is raised as SetupRootfsFailed."""
+    ft_helper = mocker.MagicMock(spec=FileTableDBHelper)
+    ft_helper.iter_dir_entries.return_value = [
+        DirRow(path="/usr", uid=0, gid=0, mode=0o40755)
+    ]
+    mocker.patch(
+        f"{LIBS_DEPLOY_IMAGE}.prepare_dirs_batch",
+        side_effect=ValueError("injected test failure"),
+    )
+
+    with pytest.raises(SetupRootfsFailed):
+        RootfsDeployer(
+            file_table_db_helper=ft_helper,
+            rootfs_dir=rootfs_dir,
+            resource_dir=resource_dir,
+            max_workers=2,
+            concurrent_tasks=10,
+        )._process_dir_entries()
+
+
+def test_setup_rootfs_non_regular_files_failure(
+    mocker: MockerFixture, resource_dir, rootfs_dir
+):
+    """Test that failure of processing non-regular files fails the setup_rootfs."""
+    mocker.patch(f"{LIBS_DEPLOY_IMAGE}.prepare_dirs_batch")
+    mocker.patch(
+        f"{LIBS_DEPLOY_IMAGE}.prepare_non_regular",
+        side_effect=OSError("injected test failure"),
+    )
+    fst_db_helper = mocker.MagicMock(spec=FileTableDBHelper)
+    fst_db_helper.iter_dir_entries.return_value = []
+    fst_db_helper.iter_regular_entries.return_value = []
+    fst_db_helper.iter_non_regular_entries.return_value = [mocker.MagicMock()]
+
+    with pytest.raises(SetupRootfsFailed, match="non-regular"):
+        RootfsDeployer(
+            file_table_db_helper=fst_db_helper,
+            rootfs_dir=rootfs_dir,
+            resource_dir=resource_dir,
+            max_workers=2,
+            concurrent_tasks=10,
+        ).setup_rootfs()
+
+
+@pytest.mark.parametrize("_non_regular_failed", (True, False))
+def test_setup_rootfs_regular_files_failure(
+    mocker: MockerFixture, resource_dir, rootfs_dir, _non_regular_failed
+):
+    """Test that failures of both regular and non-regular files are reported."""
+    mocker.patch(f"{LIBS_DEPLOY_IMAGE}.prepare_dirs_batch")
+    _non_regular_exc = RuntimeError("injected non-regular failure")
+    fst_db_helper = mocker.MagicMock(spec=FileTableDBHelper)
+    fst_db_helper.iter_dir_entries.return_value = []
+    if _non_regular_failed:
+        # NOTE: raw exception not from preparing the entry, i.e., db error
+        fst_db_helper.iter_non_regular_entries.side_effect = _non_regular_exc
+    else:
+        fst_db_helper.iter_non_regular_entries.return_value = []
+    deployer = RootfsDeployer(
+        file_table_db_helper=fst_db_helper,
+        rootfs_dir=rootfs_dir,
+        resource_dir=resource_dir,
+        max_workers=2,
+        concurrent_tasks=10,
+    )
+    _regular_exc = SetupRootfsFailed("injected regular failure")
+    mocker.patch.object(
+        deployer, "_process_regular_file_entries", side_effect=_regular_exc
+    )
+
+    with pytest.raises(SetupRootfsFailed) as exc_info:
+        deployer.setup_rootfs()
+    if _non_regular_failed:
+        assert exc_info.value.__cause__ is _regular_exc
+        assert "injected non-regular failure" in str(exc_info.value)
+    else:
+        assert exc_info.value is _regular_exc
+
+
+def test_setup_rootfs_non_regular_raw_failure(
+    mocker: MockerFixture, resource_dir, rootfs_dir
+):
+    """Test that raw failure of processing non-regular files is raised as SetupRootfsFailed."""
+    mocker.patch(f"{LIBS_DEPLOY_IMAGE}.prepare_dirs_batch")
+    _exc = RuntimeError("injected non-regular failure")
+    fst_db_helper = mocker.MagicMock(spec=FileTableDBHelper)
+    fst_db_helper.iter_dir_entries.return_value = []
+    fst_db_helper.iter_regular_entries.return_value = []
+    fst_db_helper.iter_non_regular_entries.side_effect = _exc
+
+    with pytest.raises(SetupRootfsFailed) as exc_info:
+        RootfsDeployer(
+            file_table_db_helper=fst_db_helper,
+            rootfs_dir=rootfs_dir,
+            resource_dir=resource_dir,
+            max_workers=2,
+            concurrent_tasks=10,
+        ).setup_rootfs()
+    assert exc_info.value.__cause__ is _exc
+
+
+@pytest.mark.parametrize(
+    "_errno, fallback_to_copy",
+    (
+        (errno.EXDEV, True),
+        (errno.EMLINK, True),
+        (errno.EACCES, False),
+    ),
+)
+def test_prepare_from_resource_hardlink_fallback(
+    mocker: MockerFixture, resource_dir, rootfs_dir, _errno, fallback_to_copy
+):
+    """Test that hardlinking the resource falls back to copy on EXDEV/EMLINK."""
+    entry = mocker.MagicMock()
+
+    def _failed_hardlink(_entry, **_):
+        try:
+            raise OSError(_errno, "injected test failure")
+        except OSError as e:
+            raise PrepareEntryFailed(_entry) from e
+
+    mocker.patch(
+        f"{LIBS_DEPLOY_IMAGE}.prepare_regular_hardlink", side_effect=_failed_hardlink
+    )
+    copy_mock = mocker.patch(f"{LIBS_DEPLOY_IMAGE}.prepare_regular_copy")
+    deployer = RootfsDeployer(
+        file_table_db_helper=mocker.MagicMock(spec=FileTableDBHelper),
+        rootfs_dir=rootfs_dir,
+        resource_dir=resource_dir,
+        max_workers=2,
+        concurrent_tasks=10,
+    )
+
+    if fallback_to_copy:
+        deployer._prepare_from_resource("ab" * 32, entry, True)
+        copy_mock.assert_called_once()
+        assert copy_mock.call_args.kwargs["_rs"] == resource_dir / ("ab" * 32)
+    else:
+        with pytest.raises(PrepareEntryFailed):
+            deployer._prepare_from_resource("ab" * 32, entry, True)
+        copy_mock.assert_not_called()
+
+
+def test_process_hardlinked_file_group_head_prepared_once(
+    mocker: MockerFixture, resource_dir, rootfs_dir
+):
+    """Test that only the first entry of a link group is prepared as the head,
+    and the rest of the entries are hardlinked to the head."""
+    _head = rootfs_dir / "head"
+    copy_mock = mocker.patch(
+        f"{LIBS_DEPLOY_IMAGE}.prepare_regular_copy", return_value=_head
+    )
+    hardlink_mock = mocker.patch(
+        f"{LIBS_DEPLOY_IMAGE}.prepare_regular_hardlink", return_value=_head
+    )
+    deployer = RootfsDeployer(
+        file_table_db_helper=mocker.MagicMock(spec=FileTableDBHelper),
+        rootfs_dir=rootfs_dir,
+        resource_dir=resource_dir,
+        max_workers=4,
+        concurrent_tasks=10,
+    )
+
+    entries = [
+        mocker.MagicMock(inode_id=_inode_id, size=1, contents=None)
+        for _inode_id in range(8)
+        for _ in range(16)
+    ]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for _entry in entries:
+            pool.submit(
+                deployer._process_hardlinked_file_at_thread, "ab" * 32, _entry, False
+            )
+
+    assert copy_mock.call_count == 8
+    assert hardlink_mock.call_count == len(entries) - 8
+    for _call in hardlink_mock.call_args_list:
+        assert _call.kwargs["_rs"] == _head
+        assert _call.kwargs["hardlink_skip_apply_permission"]
+    assert set(deployer._hardlink_group) == set(range(8))
+
+
+def _setup_and_deploy_resources(
+    test_artifact: Path,
+    first_image_id: ImageIdentifier,
+    workdir: Path,
+    resource_dir: Path,
+    tmp_download_dir: Path,
+) -> OTAImageDeployerSetup:
+    setup = OTAImageDeployerSetup(
+        first_image_id, artifact=test_artifact, workdir=workdir
+    )
     resources_deployer = ResourcesDeployer(
         workdir_setup=setup,
         resource_dir=resource_dir,
@@ -176,8 +675,36 @@ def test_deploy_image_e2e(
         read_size=READ_SIZE,
         rst_db_conn=2,
     )
-    resources_deployer.deploy_resources()
+    count, _ = resources_deployer.deploy_resources()
+    assert count > 0
+    return setup
 
+
+def test_deploy_image_setup_only(
+    test_artifact: Path, first_image_id, workdir, resource_dir, tmp_download_dir
+):
+    """Test the deployment workflow up to resource deployment."""
+    _setup_and_deploy_resources(
+        test_artifact, first_image_id, workdir, resource_dir, tmp_download_dir
+    )
+    assert any(resource_dir.iterdir())
+
+
+@pytest.mark.skipif(
+    os.geteuid() != 0, reason="rootfs deployment requires root for chown/chmod"
+)
+def test_deploy_image_e2e(
+    test_artifact: Path,
+    first_image_id,
+    workdir,
+    resource_dir,
+    tmp_download_dir,
+    rootfs_dir,
+):
+    """Test the full deployment workflow, including the rootfs deployment."""
+    setup = _setup_and_deploy_resources(
+        test_artifact, first_image_id, workdir, resource_dir, tmp_download_dir
+    )
     rootfs_deployer = RootfsDeployer(
         file_table_db_helper=setup.file_table_helper,
         rootfs_dir=rootfs_dir,
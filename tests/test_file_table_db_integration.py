@@ -14,19 +14,68 @@
 
 """Integration tests for file_table database operations."""
 
+import shutil
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+
 from ota_image_libs.v1.file_table.db import (
     FileTableDBHelper,
     FileTableInodeORM,
     FileTableNonRegularORM,
     FileTableRegularORM,
+    FileTableResourceORM,
 )
 from ota_image_libs.v1.file_table.schema import (
     FileTableInode,
     FileTableNonRegularFiles,
     FileTableRegularFiles,
+    FileTableResource,
 )
 
 
+@pytest.fixture(scope="module")
+def empty_ft_db(tmp_path_factory: pytest.TempPathFactory) -> FileTableDBHelper:
+    """A bootstrapped empty file_table database, shared by the tests in this module."""
+    helper = FileTableDBHelper(tmp_path_factory.mktemp("ft") / "file_table.db")
+    helper.bootstrap_db()
+    return helper
+
+
+@pytest.fixture
+def ft_db(empty_ft_db: FileTableDBHelper, tmp_path: Path) -> FileTableDBHelper:
+    """A bootstrapped empty file_table database for one test.
+
+    The database is copied from the shared empty database, instead of
+        bootstrapping it again.
+    """
+    db_file = tmp_path / "file_table.db"
+    shutil.copyfile(empty_ft_db.db_f, db_file)
+    return FileTableDBHelper(db_file)
+
+
+@pytest.fixture
+def ft_conn(ft_db: FileTableDBHelper):
+    """A connection to the test's file_table database.
+
+    NOTE: the database is discarded after test, skip syncing to disk and
+        keep the rollback journal in memory.
+    """
+    with closing(ft_db.connect_fstable_db()) as conn:
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA journal_mode=MEMORY")
+        yield conn
+
+
+class _InMemoryFileTableDBHelper(FileTableDBHelper):
+    """FileTableDBHelper on a shared-cache in-memory database specified by URI."""
+
+    def connect_fstable_db(self, **_) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_f, uri=True, check_same_thread=False)
+
+
 class TestFileTableDBHelper:
     def test_bootstrap_db(self, tmp_path):
         """Test bootstrapping the file table database."""
@@ -71,56 +120,25 @@ class TestFileTableDBHelper:
         assert conn is not None
         conn.close()
 
-    def test_iter_dir_entries_empty(self, tmp_path):
-        """Test iterating directory entries on empty database."""
-        db_file = tmp_path / "file_table.db"
-
-        helper = FileTableDBHelper(db_file)
-        helper.bootstrap_db()
-
-        entries = list(helper.iter_dir_entries())
-        assert len(entries) == 0
-
-    def test_iter_regular_entries_empty(self, tmp_path):
-        """Test iterating regular file entries on empty database."""
-        db_file = tmp_path / "file_table.db"
-
-        helper = FileTableDBHelper(db_file)
-        helper.bootstrap_db()
-
-        entries = list(helper.iter_regular_entries())
+    @pytest.mark.parametrize(
+        "method_name",
+        (
+            "iter_dir_entries",
+            "iter_regular_entries",
+            "iter_non_regular_entries",
+            "select_all_digests_with_size",
+        ),
+    )
+    def test_iter_empty_db(self, empty_ft_db: FileTableDBHelper, method_name: str):
+        """Test iterating entries on empty database."""
+        entries = list(getattr(empty_ft_db, method_name)())
         assert len(entries) == 0
 
-    def test_iter_non_regular_entries_empty(self, tmp_path):
-        """Test iterating non-regular file entries on empty database."""
-        db_file = tmp_path / "file_table.db"
-
-        helper = FileTableDBHelper(db_file)
-        helper.bootstrap_db()
-
-        entries = list(helper.iter_non_regular_entries())
-        assert len(entries) == 0
-
-    def test_select_all_digests_empty(self, tmp_path):
-        """Test selecting all digests from empty database."""
-        db_file = tmp_path / "file_table.db"
-
-        helper = FileTableDBHelper(db_file)
-        helper.bootstrap_db()
-
-        digests = list(helper.select_all_digests_with_size())
-        assert len(digests) == 0
-
 
 class TestFileTableIntegration:
-    def test_create_and_query_inodes(self, tmp_path):
+    def test_create_and_query_inodes(self, ft_conn: sqlite3.Connection):
         """Test creating and querying inode entries."""
-        db_file = tmp_path / "file_table.db"
-
-        helper = FileTableDBHelper(db_file)
-        helper.bootstrap_db()
-
-        conn = helper.connect_fstable_db()
+        conn = ft_conn
         orm = FileTableInodeORM(conn)
 
         # Create inode entry
@@ -142,16 +160,9 @@ class TestFileTableIntegration:
         assert entries[0].gid == 1000
         assert entries[0].mode == 0o644
 
-        conn.close()
-
-    def test_create_regular_file_entry(self, tmp_path):
+    def test_create_regular_file_entry(self, ft_conn: sqlite3.Connection):
         """Test creating regular file entry."""
-        db_file = tmp_path / "file_table.db"
-
-        helper = FileTableDBHelper(db_file)
-        helper.bootstrap_db()
-
-        conn = helper.connect_fstable_db()
+        conn = ft_conn
         inode_orm = FileTableInodeORM(conn)
         regular_orm = FileTableRegularORM(conn)
 
@@ -181,16 +192,41 @@ class TestFileTableIntegration:
         assert entries[0].inode_id == 1
         assert entries[0].resource_id == 100
 
-        conn.close()
-
-    def test_create_non_regular_file_entry(self, tmp_path):
-        """Test creating non-regular file entry (symlink)."""
-        db_file = tmp_path / "file_table.db"
+    def test_iter_regular_entries_grouped_by_digest(
+        self, ft_db: FileTableDBHelper, ft_conn: sqlite3.Connection
+    ):
+        """Test regular file entries of the same digest are yielded consecutively."""
+        conn = ft_conn
+        inode_orm = FileTableInodeORM(conn)
+        regular_orm = FileTableRegularORM(conn)
+        resource_orm = FileTableResourceORM(conn)
+
+        # NOTE: insert the entries of each table in batch, with one commit per table
+        resource_orm.orm_insert_entries(
+            FileTableResource(
+                resource_id=_resource_id, digest=bytes([_resource_id]) * 32, size=1
+            )
+            for _resource_id in range(3)
+        )
+        inode_orm.orm_insert_entries(
+            FileTableInode(inode_id=_idx, uid=0, gid=0, mode=0o100644)
+            for _idx in range(12)
+        )
+        # interleave the entries of different resources
+        regular_orm.orm_insert_entries(
+            FileTableRegularFiles(
+                path=f"/test/file_{_idx}", inode_id=_idx, resource_id=_idx % 3
+            )
+            for _idx in range(12)
+        )
 
-        helper = FileTableDBHelper(db_file)
-        helper.bootstrap_db()
+        digests = [_entry.digest for _entry in ft_db.iter_regular_entries()]
+        assert len(digests) == 12
+        assert digests == sorted(digests)
 
-        conn = helper.connect_fstable_db()
+    def test_create_non_regular_file_entry(self, ft_conn: sqlite3.Connection):
+        """Test creating non-regular file entry (symlink)."""
+        conn = ft_conn
         inode_orm = FileTableInodeORM(conn)
         non_regular_orm = FileTableNonRegularORM(conn)
 
@@ -220,35 +256,31 @@ class TestFileTableIntegration:
         assert entries[0].inode_id == 2
         assert entries[0].meta == b"/target/path"
 
-        conn.close()
-
-    def test_multiple_connections(self, tmp_path):
-        """Test multiple connections to the same database."""
-        db_file = tmp_path / "file_table.db"
-
-        helper = FileTableDBHelper(db_file)
-        helper.bootstrap_db()
-
-        # First connection - insert
-        conn1 = helper.connect_fstable_db()
-        orm1 = FileTableInodeORM(conn1)
-
-        inode = FileTableInode(
-            inode_id=1,
-            uid=1000,
-            gid=1000,
-            mode=0o644,
+    def test_multiple_connections(self, request: pytest.FixtureRequest):
+        """Test multiple live connections to the same database."""
+        helper = _InMemoryFileTableDBHelper(
+            f"file:{request.node.name}?mode=memory&cache=shared"
         )
-        orm1.orm_insert_entry(inode)
-        conn1.commit()
-        conn1.close()
-
-        # Second connection - read
-        conn2 = helper.connect_fstable_db()
-        orm2 = FileTableInodeORM(conn2)
-
-        entries = list(orm2.orm_select_entries())
-        assert len(entries) == 1
-        assert entries[0].inode_id == 1
-
-        conn2.close()
+        # NOTE: the in-memory database only lives as long as any connection
+        #       to it is opened, the two connections are kept opened through the test.
+        with closing(helper.connect_fstable_db()) as conn1, closing(
+            helper.connect_fstable_db()
+        ) as conn2:
+            helper.bootstrap_db()
+
+            # First connection - insert
+            orm1 = FileTableInodeORM(conn1)
+            inode = FileTableInode(
+                inode_id=1,
+                uid=1000,
+                gid=1000,
+                mode=0o644,
+            )
+            orm1.orm_insert_entry(inode)
+            conn1.commit()
+
+            # Second connection - read the committed entry
+            orm2 = FileTableInodeORM(conn2)
+            entries = list(orm2.orm_select_entries())
+            assert len(entries) == 1
+            assert entries[0].inode_id == 1
@@ -16,6 +16,7 @@
 
 from __future__ import annotations
 
+import errno
 import os
 import stat
 from pathlib import Path
@@ -23,17 +24,25 @@ from pathlib import Path
 import pytest
 
 from ota_image_libs.common import MsgPackedDict
+from ota_image_libs.v1.file_table import utils as file_table_utils
 from ota_image_libs.v1.file_table.db import DirRow, NonRegularFileRow, RegularFileRow
 from ota_image_libs.v1.file_table.utils import (
+    COPY_BUFSIZE,
     PrepareEntryFailed,
+    _copyfile_slim,
+    _entry_fpath_on_target,
     _set_xattr,
+    fpath_on_target,
     prepare_dir,
+    prepare_dirs_batch,
     prepare_non_regular,
     prepare_regular_copy,
     prepare_regular_hardlink,
     prepare_regular_inlined,
 )
 
+COMMON_IO = "ota_image_libs.common.io"
+
 
 class TestSetXattr:
     """Tests for _set_xattr function."""
@@ -76,6 +85,15 @@ class TestSetXattr:
         assert actual == b"link_value"
 
 
+@pytest.mark.parametrize("_path", ("/", "/a", "/a/b/c.txt"))
+def test_entry_fpath_on_target(tmp_path, _path):
+    """Test that the entry path is joined to target_mnt as with fpath_on_target."""
+    target_mnt = tmp_path / "mnt"
+    assert _entry_fpath_on_target(_path, target_mnt) == fpath_on_target(
+        Path(_path), target_mnt=target_mnt
+    )
+
+
 class TestPrepareDir:
     """Tests for prepare_dir function."""
 
@@ -175,6 +193,52 @@ class TestPrepareDir:
         assert exc_info.value.entry == entry
 
 
+class TestPrepareDirsBatch:
+    """Tests for prepare_dirs_batch function."""
+
+    def test_prepare_dirs_batch(self, tmp_path, mocker):
+        """Test that unsorted dirs are all prepared, and only the dirs with
+        unprepared parent walk through their ancestors."""
+        target_mnt = tmp_path / "mnt"
+        target_mnt.mkdir()
+
+        _dirs = ["/a/b/c", "/x/y", "/a", "/a/b", "/a/b2"]
+        entries = [
+            DirRow(path=_path, uid=os.getuid(), gid=os.getgid(), mode=0o750)
+            for _path in _dirs
+        ]
+        prepare_dir_spy = mocker.spy(file_table_utils, "prepare_dir")
+
+        prepare_dirs_batch(entries, target_mnt=target_mnt)
+
+        for _path in _dirs:
+            created_dir = target_mnt / _path.lstrip("/")
+            assert created_dir.is_dir()
+            assert stat.S_IMODE(created_dir.stat().st_mode) == 0o750
+        assert {
+            _call.args[0].path: _call.kwargs["parents"]
+            for _call in prepare_dir_spy.call_args_list
+        } == {"/a": True, "/a/b": False, "/a/b/c": False, "/a/b2": False, "/x/y": True}
+
+    def test_prepare_dirs_batch_failure_raises_exception(self, tmp_path):
+        """Test that failure at any dir raises PrepareEntryFailed with that entry."""
+        target_mnt = tmp_path / "mnt"
+        target_mnt.mkdir()
+        (target_mnt / "b").touch()
+
+        failed_entry = DirRow(path="/b/c", uid=os.getuid(), gid=os.getgid(), mode=0o755)
+        entries = [
+            failed_entry,
+            DirRow(path="/a", uid=os.getuid(), gid=os.getgid(), mode=0o755),
+        ]
+
+        with pytest.raises(PrepareEntryFailed) as exc_info:
+            prepare_dirs_batch(entries, target_mnt=target_mnt)
+
+        assert exc_info.value.entry == failed_entry
+        assert (target_mnt / "a").is_dir()
+
+
 class TestPrepareNonRegular:
     """Tests for prepare_non_regular function."""
 
@@ -254,6 +318,55 @@ class TestPrepareNonRegular:
         prepare_non_regular(entry, target_mnt=target_mnt)
 
 
+class TestCopyfileSlim:
+    """Tests for _copyfile_slim function."""
+
+    @pytest.mark.parametrize(
+        "size", (0, 123, COPY_BUFSIZE, COPY_BUFSIZE * 2 + 123), ids=str
+    )
+    def test_copyfile_slim(self, tmp_path, size):
+        """Test copying files across the copy buffer size boundary."""
+        src, dst = tmp_path / "src", tmp_path / "dst"
+        src.write_bytes(os.urandom(size))
+
+        _copyfile_slim(src, dst)
+        assert dst.read_bytes() == src.read_bytes()
+
+    def test_copyfile_slim_truncate_existing(self, tmp_path):
+        """Test that existing dst is truncated before copying."""
+        src, dst = tmp_path / "src", tmp_path / "dst"
+        src.write_bytes(b"short")
+        dst.write_bytes(b"much longer previous contents")
+
+        _copyfile_slim(src, dst)
+        assert dst.read_bytes() == b"short"
+
+    @pytest.mark.parametrize("_errno", (errno.EXDEV, errno.ENOSYS), ids=str)
+    def test_copyfile_slim_fallback(self, tmp_path, mocker, _errno):
+        """Test that copy falls back to read/write with the per-thread copy buffer."""
+        src, dst = tmp_path / "src", tmp_path / "dst"
+        src.write_bytes(os.urandom(COPY_BUFSIZE * 2 + 123))
+        _step = mocker.MagicMock(side_effect=OSError(_errno, "injected"))
+        mocker.patch(f"{COMMON_IO}._FD_COPY_STEPS", (_step,))
+        readv_spy = mocker.spy(os, "readv")
+
+        _copyfile_slim(src, dst)
+        assert dst.read_bytes() == src.read_bytes()
+        _step.assert_called_once()
+        _buffer = file_table_utils._get_copy_buffer()
+        assert readv_spy.call_count == 4
+        assert all(_call.args[1] == [_buffer] for _call in readv_spy.call_args_list)
+
+    def test_copyfile_slim_error_not_fallback(self, tmp_path, mocker):
+        """Test that copy_file_range errors other than unsupported are raised."""
+        src, dst = tmp_path / "src", tmp_path / "dst"
+        src.write_bytes(b"data")
+        mocker.patch("os.copy_file_range", side_effect=OSError(errno.EIO, "injected"))
+
+        with pytest.raises(OSError):
+            _copyfile_slim(src, dst)
+
+
 class TestPrepareRegularCopy:
     """Tests for prepare_regular_copy function."""
 
@@ -461,6 +574,52 @@ class TestPrepareRegularInlined:
         actual = os.getxattr(result, "user.inline")
         assert actual == b"attr_value"
 
+    @pytest.mark.skipif(os.geteuid() != 0, reason="chown requires root")
+    def test_prepare_regular_inlined_with_owner(self, tmp_path):
+        """Test that owner is applied before mode, keeping the setuid bit."""
+        target_mnt = tmp_path / "mnt"
+        target_mnt.mkdir()
+
+        entry = RegularFileRow(
+            path="/file.bin",
+            uid=1000,
+            gid=1000,
+            mode=stat.S_IFREG | 0o4755,
+            digest=b"digest",
+            size=4,
+            inode_id=1,
+            contents=b"data",
+        )
+
+        result = prepare_regular_inlined(entry, target_mnt=target_mnt)
+
+        _stat = result.stat()
+        assert (_stat.st_uid, _stat.st_gid) == (1000, 1000)
+        assert stat.S_IMODE(_stat.st_mode) == 0o4755
+        assert result.read_bytes() == b"data"
+
+    def test_prepare_regular_inlined_failure_cleanup(self, tmp_path):
+        """Test that the target is removed if applying the metadata failed."""
+        target_mnt = tmp_path / "mnt"
+        target_mnt.mkdir()
+
+        entry = RegularFileRow(
+            path="/file.txt",
+            uid=os.getuid(),
+            gid=os.getgid(),
+            mode=0o644,
+            digest=b"digest",
+            size=4,
+            inode_id=1,
+            contents=b"data",
+            # NOTE: xattr namespace other than user/trusted/security/system is invalid
+            xattrs=MsgPackedDict({"invalid.attr": b"value"}),
+        )
+
+        with pytest.raises(PrepareEntryFailed):
+            prepare_regular_inlined(entry, target_mnt=target_mnt)
+        assert not (target_mnt / "file.txt").exists()
+
 
 class TestPrepareRegularHardlink:
     """Tests for prepare_regular_hardlink function."""
@@ -17,12 +17,9 @@ from __future__ import annotations
 
 import base64
 import json
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 
 import pytest
-from cryptography import x509
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import ec
 from cryptography.hazmat.primitives.asymmetric.ec import EllipticCurvePrivateKey
 from cryptography.hazmat.primitives.serialization import (
     Encoding,
@@ -30,10 +27,8 @@ from cryptography.hazmat.primitives.serialization import (
     PrivateFormat,
 )
 from cryptography.x509 import Certificate
-from cryptography.x509.oid import NameOID
 from jwt.exceptions import InvalidSignatureError
 
-from ota_image_libs._crypto.x509_utils import X5cX509CertChain
 from ota_image_libs.common.oci_spec import Sha256Digest
 from ota_image_libs.v1.image_index.schema import ImageIndex
 from ota_image_libs.v1.index_jwt.utils import (
@@ -43,6 +38,12 @@ from ota_image_libs.v1.index_jwt.utils import (
 )
 
 
+def _b64url_nopad(obj: dict) -> str:
+    """Encode <obj> as compact JSON, in base64url without padding as JWT segment."""
+    _raw = json.dumps(obj, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(_raw).rstrip(b"=").decode("ascii")
+
+
 class TestIndexJWTUtils:
     def test_get_index_jwt_sign_cert_chain_missing_x5c(self):
         """Test extracting cert chain from JWT without x5c header."""
@@ -61,40 +62,22 @@ class TestIndexJWTUtils:
         # JWT with x5c as string instead of list
         # Header: {"alg": "ES256", "typ": "JWT", "x5c": "invalid"}
         header = {"alg": "ES256", "typ": "JWT", "x5c": "not_a_list"}
-        header_b64 = (
-            base64.urlsafe_b64encode(json.dumps(header).encode()).decode().rstrip("=")
+        fake_jwt = (
+            f"{_b64url_nopad(header)}.{_b64url_nopad({'test': 'test'})}.fake_signature"
         )
-        payload_b64 = base64.urlsafe_b64encode(b'{"test": "test"}').decode().rstrip("=")
-        fake_jwt = f"{header_b64}.{payload_b64}.fake_signature"
 
         with pytest.raises(ValueError):
             get_index_jwt_sign_cert_chain(fake_jwt)
 
     def test_get_index_jwt_sign_cert_chain_with_valid_chain(
-        self, end_entity_cert, intermediate_ca_cert, image_descriptor
+        self, end_entity_cert, intermediate_ca_cert, signed_index_jwt
     ):
         """Test extracting valid cert chain from JWT."""
-        ee_cert, ee_key = end_entity_cert
+        ee_cert, _ = end_entity_cert
         intermediate_cert, _ = intermediate_ca_cert
 
-        # Create a cert chain
-        chain = X5cX509CertChain.validator([ee_cert, intermediate_cert])
-
-        # Create a JWT with this cert chain
-        ee_key_pem = ee_key.private_bytes(
-            encoding=Encoding.PEM,
-            format=PrivateFormat.PKCS8,
-            encryption_algorithm=NoEncryption(),
-        )
-
-        jwt_token = compose_index_jwt(
-            image_descriptor,
-            sign_cert_chain=chain,
-            sign_key=ee_key_pem,
-        )
-
         # Extract the cert chain
-        extracted_chain = get_index_jwt_sign_cert_chain(jwt_token)
+        extracted_chain = get_index_jwt_sign_cert_chain(signed_index_jwt)
 
         assert extracted_chain.ee.subject == ee_cert.subject
         assert len(extracted_chain.interms) == 1
@@ -105,6 +88,8 @@ class TestIndexJWTUtils:
         self,
         end_entity_cert: tuple[Certificate, EllipticCurvePrivateKey],
         intermediate_ca_cert: tuple[Certificate, EllipticCurvePrivateKey],
+        ee_key_pem: bytes,
+        x5c_pem_certs: list[str],
         image_descriptor: ImageIndex.Descriptor,
     ):
         """Test backward compatibility: x5c header with PEM certs instead of base64 DER.
@@ -112,15 +97,10 @@ class TestIndexJWTUtils:
         Although RFC 7515 specifies x5c should contain base64-encoded DER,
         we maintain backward compatibility by also accepting PEM format.
         """
-        ee_cert, ee_key = end_entity_cert
+        ee_cert, _ = end_entity_cert
         intermediate_cert, _ = intermediate_ca_cert
 
         # Create JWT manually with PEM certs in x5c (backward compatibility)
-        ee_pem = ee_cert.public_bytes(serialization.Encoding.PEM).decode("utf-8")
-        intermediate_pem = intermediate_cert.public_bytes(
-            serialization.Encoding.PEM
-        ).decode("utf-8")
-
         # Create claims
         from ota_image_libs.v1.index_jwt.schema import IndexJWTClaims
 
@@ -132,14 +112,8 @@ class TestIndexJWTUtils:
         # Manually compose JWT with PEM certs
         from ota_image_libs._crypto.jwt_utils import compose_jwt
 
-        ee_key_pem = ee_key.private_bytes(
-            encoding=Encoding.PEM,
-            format=PrivateFormat.PKCS8,
-            encryption_algorithm=NoEncryption(),
-        )
-
         # Use PEM certs instead of base64 DER (backward compatibility)
-        headers = {"x5c": [ee_pem, intermediate_pem]}
+        headers = {"x5c": x5c_pem_certs}
 
         jwt_token = compose_jwt(
             payload=claims.model_dump(by_alias=True, exclude_none=True),
@@ -179,11 +153,9 @@ class TestComposeIndexJwt:
                 sign_key=invalid_key,
             )
 
-    def test_compose_index_jwt_with_valid_ecdsa_key(self, mocker):
+    def test_compose_index_jwt_with_valid_ecdsa_key(self, mocker, spare_ecdsa_key):
         """Test compose_index_jwt with a valid ECDSA key."""
-        # Generate a real ECDSA key
-        private_key = ec.generate_private_key(ec.SECP256R1())
-        private_key_pem = private_key.private_bytes(
+        private_key_pem = spare_ecdsa_key.private_bytes(
             encoding=Encoding.PEM,
             format=PrivateFormat.PKCS8,
             encryption_algorithm=NoEncryption(),
@@ -210,17 +182,9 @@ class TestComposeIndexJwt:
         assert jwt.count(".") == 2  # JWT has 3 parts separated by dots
 
     def test_compose_index_jwt_end_to_end(
-        self, cert_chain, end_entity_cert, image_descriptor
+        self, cert_chain, ee_key_pem, image_descriptor
     ):
         """Test compose_index_jwt end-to-end with real certificate chain."""
-        _, ee_key = end_entity_cert
-
-        ee_key_pem = ee_key.private_bytes(
-            encoding=Encoding.PEM,
-            format=PrivateFormat.PKCS8,
-            encryption_algorithm=NoEncryption(),
-        )
-
         jwt_token = compose_index_jwt(
             image_descriptor,
             sign_cert_chain=cert_chain,
@@ -293,98 +257,33 @@ class TestDecodeIndexJwtWithVerification:
 
     def test_decode_index_jwt_with_verification_e2e(
         self,
-        cert_chain: X5cX509CertChain,
-        end_entity_cert: tuple[Certificate, EllipticCurvePrivateKey],
+        signed_index_jwt: str,
         image_descriptor,
     ):
         """Test decode and verify JWT end-to-end."""
-        _, ee_key = end_entity_cert
-
-        ee_key_pem = ee_key.private_bytes(
-            encoding=Encoding.PEM,
-            format=PrivateFormat.PKCS8,
-            encryption_algorithm=NoEncryption(),
-        )
-
-        # Create JWT
-        jwt_token = compose_index_jwt(
-            image_descriptor,
-            sign_cert_chain=cert_chain,
-            sign_key=ee_key_pem,
-        )
-
         # Extract and verify
-        extracted_chain = get_index_jwt_sign_cert_chain(jwt_token)
-        claims = decode_index_jwt_with_verification(jwt_token, extracted_chain)
+        extracted_chain = get_index_jwt_sign_cert_chain(signed_index_jwt)
+        claims = decode_index_jwt_with_verification(signed_index_jwt, extracted_chain)
 
         # Verify claims
         assert claims.image_index.digest == image_descriptor.digest
         assert claims.image_index.size == image_descriptor.size
         assert claims.iat is not None
 
-    def test_decode_index_jwt_with_wrong_key(
-        self, cert_chain, end_entity_cert, image_descriptor
-    ):
+    def test_decode_index_jwt_with_wrong_key(self, signed_index_jwt, wrong_cert_chain):
         """Test decode fails when using wrong signing certificate."""
-        _, ee_key = end_entity_cert
-
-        ee_key_pem = ee_key.private_bytes(
-            encoding=Encoding.PEM,
-            format=PrivateFormat.PKCS8,
-            encryption_algorithm=NoEncryption(),
-        )
-
-        # Create JWT
-        jwt_token = compose_index_jwt(
-            image_descriptor,
-            sign_cert_chain=cert_chain,
-            sign_key=ee_key_pem,
-        )
-
-        # Create a different cert chain
-        different_key = ec.generate_private_key(ec.SECP256R1())
-        different_subject = x509.Name(
-            [x509.NameAttribute(NameOID.COMMON_NAME, "Different Cert")]
-        )
-        different_issuer = x509.Name(
-            [x509.NameAttribute(NameOID.COMMON_NAME, "Different CA")]
-        )
-        different_cert = (
-            x509.CertificateBuilder()
-            .subject_name(different_subject)
-            .issuer_name(different_issuer)
-            .public_key(different_key.public_key())
-            .serial_number(x509.random_serial_number())
-            .not_valid_before(datetime.now(timezone.utc))
-            .not_valid_after(datetime.now(timezone.utc) + timedelta(days=90))
-            .sign(different_key, hashes.SHA256())
-        )
-
-        wrong_chain = X5cX509CertChain()
-        wrong_chain.add_ee(different_cert)
-
         # Verification should fail with invalid signature
         with pytest.raises(InvalidSignatureError):
-            decode_index_jwt_with_verification(jwt_token, wrong_chain)
+            decode_index_jwt_with_verification(signed_index_jwt, wrong_cert_chain)
 
     @pytest.mark.filterwarnings("ignore::DeprecationWarning")
-    def test_e2e_with_backward_compatible_pem(
-        self, end_entity_cert, intermediate_ca_cert
-    ):
+    def test_e2e_with_backward_compatible_pem(self, ee_key_pem, x5c_pem_certs):
         """Test full workflow: compose with PEM certs (backward compatibility) and verify.
 
         This tests the backward compatibility feature where x5c header can contain
         PEM certificates instead of base64-encoded DER as per RFC 7515.
         """
-        ee_cert, ee_key = end_entity_cert
-        intermediate_cert, _ = intermediate_ca_cert
-
         # Create JWT manually with PEM certs in x5c (backward compatibility)
-        ee_pem = ee_cert.public_bytes(serialization.Encoding.PEM).decode("utf-8")
-        intermediate_pem = intermediate_cert.public_bytes(
-            serialization.Encoding.PEM
-        ).decode("utf-8")
-
         # Create claims
         from ota_image_libs.v1.index_jwt.schema import IndexJWTClaims
 
@@ -400,14 +299,8 @@ class TestDecodeIndexJwtWithVerification:
         # Manually compose JWT with PEM certs
         from ota_image_libs._crypto.jwt_utils import compose_jwt
 
-        ee_key_pem = ee_key.private_bytes(
-            encoding=Encoding.PEM,
-            format=PrivateFormat.PKCS8,
-            encryption_algorithm=NoEncryption(),
-        )
-
         # Use PEM certs instead of base64 DER (backward compatibility)
-        headers = {"x5c": [ee_pem, intermediate_pem]}
+        headers = {"x5c": x5c_pem_certs}
 
         jwt_token = compose_jwt(
             payload=claims.model_dump(by_alias=True, exclude_none=True),
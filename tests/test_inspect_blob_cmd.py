@@ -22,6 +22,7 @@ from unittest.mock import patch
 import pytest
 
 from ota_image_libs.v1.artifact.reader import OTAImageArtifactReader
+from ota_image_libs.v1.consts import RESOURCE_DIR
 from ota_image_tools.cmds.inspect_blob import (
     _inspect_blob_from_folder,
     _inspect_blob_from_image_artifact,
@@ -172,6 +173,8 @@ class TestInspectBlobFromFolder:
 
         assert save_dst.exists()
         assert save_dst.stat().st_size > 0
+        _blob = extracted_ota_image / RESOURCE_DIR / valid_blob_digest
+        assert save_dst.read_bytes() == _blob.read_bytes()
 
     def test_inspect_blob_as_text(
         self, extracted_ota_image: Path, valid_blob_digest: str, capsys
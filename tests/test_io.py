@@ -12,10 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import errno
 import hashlib
+import os
 
+import pytest
+
+from ota_image_libs.common import io as _io
 from ota_image_libs.common.io import (
     cal_file_digest,
+    copy_fd,
+    copy_fd_region,
     file_sha256,
     remove_file,
 )
@@ -77,3 +84,137 @@ class TestRemoveFile:
 
         remove_file(test_dir)
         assert not test_dir.exists()
+
+
+class TestCopyFd:
+    @pytest.fixture
+    def src_file(self, tmp_path):
+        src = tmp_path / "src"
+        src.write_bytes(os.urandom(3 * 1024**2 + 123))
+        return src
+
+    def _copy(self, src, dst, *, append: bool = False) -> int:
+        # NOTE: not opening dst with O_APPEND, which is not supported by
+        #       copy_file_range/sendfile.
+        with open(src, "rb", buffering=0) as src_f, open(
+            dst, "r+b" if append else "wb", buffering=0
+        ) as dst_f:
+            if append:
+                dst_f.seek(0, os.SEEK_END)
+            return copy_fd(src_f.fileno(), dst_f.fileno())
+
+    def test_copy_fd(self, mocker, src_file, tmp_path):
+        """Test copying file contents between fds without the read/write fallback."""
+        read_spy = mocker.spy(os, "read")
+        dst = tmp_path / "dst"
+        assert self._copy(src_file, dst) == src_file.stat().st_size
+        assert dst.read_bytes() == src_file.read_bytes()
+        read_spy.assert_not_called()
+
+    def test_copy_fd_append(self, mocker, src_file, tmp_path):
+        """Test that copy starts from the current offset of dst fd."""
+        read_spy = mocker.spy(os, "read")
+        dst = tmp_path / "dst"
+        self._copy(src_file, dst)
+        self._copy(src_file, dst, append=True)
+        assert dst.read_bytes() == src_file.read_bytes() * 2
+        read_spy.assert_not_called()
+
+    def test_copy_fd_fallback_to_read_write(self, mocker, src_file, tmp_path):
+        """Test that copy falls back to read/write when fast paths are unsupported."""
+
+        def _unsupported(*_):
+            raise OSError(errno.EXDEV, "injected unsupported")
+
+        mocker.patch.object(_io, "_FD_COPY_STEPS", (_unsupported, _unsupported))
+        dst = tmp_path / "dst"
+        assert self._copy(src_file, dst) == src_file.stat().st_size
+        assert dst.read_bytes() == src_file.read_bytes()
+
+    def test_copy_fd_raises_on_other_errors(self, mocker, src_file, tmp_path):
+        """Test that errors other than unsupported ones are raised."""
+
+        def _no_space(*_):
+            raise OSError(errno.ENOSPC, "injected no space")
+
+        mocker.patch.object(_io, "_FD_COPY_STEPS", (_no_space,))
+        with pytest.raises(OSError):
+            self._copy(src_file, tmp_path / "dst")
+
+    def test_copy_fd_step_copies_nothing(self, mocker, src_file, tmp_path):
+        """Test that a method returning 0 before copying anything is not taken as EOF."""
+        _nothing_copied = mocker.MagicMock(return_value=0)
+        mocker.patch.object(
+            _io, "_FD_COPY_STEPS", (_nothing_copied, _io._sendfile_step)
+        )
+        dst = tmp_path / "dst"
+        assert self._copy(src_file, dst) == src_file.stat().st_size
+        assert dst.read_bytes() == src_file.read_bytes()
+        _nothing_copied.assert_called_once()
+
+    def test_copy_fd_empty_src(self, tmp_path):
+        """Test copying an empty file."""
+        src, dst = tmp_path / "src", tmp_path / "dst"
+        src.write_bytes(b"")
+        assert self._copy(src, dst) == 0
+        assert dst.read_bytes() == b""
+
+
+class TestCopyFdRegion:
+    @pytest.fixture
+    def src_file(self, tmp_path):
+        src = tmp_path / "src"
+        src.write_bytes(os.urandom(3 * 1024**2 + 123))
+        return src
+
+    def _copy(self, src, dst, offset, size) -> int:
+        with open(src, "rb", buffering=0) as src_f, open(
+            dst, "wb", buffering=0
+        ) as dst_f:
+            _copied = copy_fd_region(
+                src_f.fileno(), dst_f.fileno(), offset=offset, size=size
+            )
+            # the offset of src fd is not changed
+            assert src_f.tell() == 0
+            return _copied
+
+    @pytest.mark.parametrize(
+        "offset, size",
+        (
+            (0, 3 * 1024**2 + 123),
+            (123, 1024**2),
+            (3 * 1024**2, 123),
+            (0, 0),
+        ),
+    )
+    def test_copy_fd_region(self, src_file, tmp_path, offset, size):
+        """Test copying a region of the src file."""
+        dst = tmp_path / "dst"
+        assert self._copy(src_file, dst, offset, size) == size
+        assert dst.read_bytes() == src_file.read_bytes()[offset : offset + size]
+
+    def test_copy_fd_region_beyond_eof(self, src_file, tmp_path):
+        """Test that copy stops at EOF of the src file."""
+        dst = tmp_path / "dst"
+        _src_size = src_file.stat().st_size
+        assert self._copy(src_file, dst, 1024, _src_size) == _src_size - 1024
+
+    def test_copy_fd_region_fallback_to_pread(self, mocker, src_file, tmp_path):
+        """Test that copy falls back to pread/write when fast paths are unsupported."""
+
+        def _unsupported(*_):
+            raise OSError(errno.ENOSYS, "injected unsupported")
+
+        mocker.patch.object(_io, "_FD_REGION_COPY_STEPS", (_unsupported,))
+        dst = tmp_path / "dst"
+        assert self._copy(src_file, dst, 100, 2 * 1024**2) == 2 * 1024**2
+        assert dst.read_bytes() == src_file.read_bytes()[100 : 100 + 2 * 1024**2]
+
+    def test_copy_fd_region_step_copies_nothing(self, mocker, src_file, tmp_path):
+        """Test that a method returning 0 before copying anything is not taken as EOF."""
+        _nothing_copied = mocker.MagicMock(return_value=0)
+        mocker.patch.object(_io, "_FD_REGION_COPY_STEPS", (_nothing_copied,))
+        dst = tmp_path / "dst"
+        assert self._copy(src_file, dst, 100, 2 * 1024**2) == 2 * 1024**2
+        assert dst.read_bytes() == src_file.read_bytes()[100 : 100 + 2 * 1024**2]
+        _nothing_copied.assert_called_once()
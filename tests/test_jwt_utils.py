@@ -60,6 +60,22 @@ class TestJWTUtils:
         assert isinstance(token, str)
         assert len(token.split(".")) == 3  # JWT has 3 parts
 
+    def test_compose_jwt_with_loaded_key(self, rsa_keypair):
+        """Test JWT composition with an already loaded private key object."""
+        private_pem, public_key = rsa_keypair
+        payload = {"sub": "1234567890"}
+
+        token = compose_jwt(
+            payload=payload,
+            priv_key=serialization.load_pem_private_key(private_pem, None),
+            alg="RS256",
+        )
+
+        assert (
+            get_verified_jwt_payload(token, pub_key=public_key, allowed_algs=["RS256"])
+            == payload
+        )
+
     def test_get_verified_jwt_payload(self, rsa_keypair):
         """Test JWT payload verification."""
         private_key, public_key = rsa_keypair
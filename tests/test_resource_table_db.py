@@ -14,6 +14,7 @@
 
 """Integration tests for resource_table database operations."""
 
+from ota_image_libs._resource_filter import CompressFilter
 from ota_image_libs.v1.resource_table.db import ResourceTableDBHelper
 from ota_image_libs.v1.resource_table.schema import ResourceTableManifest
 
@@ -136,6 +137,31 @@ class TestResourceTableDBHelper:
         expected_ids = {i for i in range(5)}
         assert resource_ids == expected_ids
 
+    def test_select_blobs_digest_with_size(self, tmp_path):
+        """Test that only resources without filter applied are selected."""
+        db_file = tmp_path / "resource_table.db"
+
+        helper = ResourceTableDBHelper(db_file)
+        helper.bootstrap_db()
+
+        conn = helper.connect_rstable_db()
+        orm = helper.get_orm(conn)
+        orm.orm_insert_entry(
+            ResourceTableManifest(resource_id=0, digest=b"0" * 32, size=100)
+        )
+        orm.orm_insert_entry(
+            ResourceTableManifest(
+                resource_id=1,
+                digest=b"1" * 32,
+                size=1000,
+                filter_applied=CompressFilter(resource_id=0, compression_alg="zstd"),
+            )
+        )
+        conn.commit()
+        conn.close()
+
+        assert list(helper.select_blobs_digest_with_size()) == [(b"0" * 32, 100)]
+
 
 class TestResourceTableIntegration:
     def test_create_and_query_entries(self, tmp_path):
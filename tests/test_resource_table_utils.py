@@ -21,6 +21,7 @@ from ota_image_libs.v1.resource_table.schema import ResourceTableManifest
 from ota_image_libs.v1.resource_table.utils import (
     recreate_sliced_resource,
     recreate_zstd_compressed_resource,
+    recreate_zstd_compressed_resource_from_slices,
 )
 
 
@@ -134,3 +135,36 @@ class TestRecreateZstdCompressedResource:
 
         assert save_dst.exists()
         assert save_dst.read_bytes() == original_data
+
+    def test_recreate_zstd_compressed_resource_from_slices(self, tmp_path):
+        """Test decompressing resource directly from the compressed slices."""
+        original_data = b"Sliced and compressed test data. " * 1000
+        compressed_data = zstandard.ZstdCompressor().compress(original_data)
+
+        slices = []
+        _slice_size = len(compressed_data) // 3 + 1
+        for _idx in range(3):
+            _slice = tmp_path / f"slice{_idx}.bin"
+            _slice.write_bytes(
+                compressed_data[_idx * _slice_size : (_idx + 1) * _slice_size]
+            )
+            slices.append(_slice)
+
+        entry = ResourceTableManifest(
+            resource_id=5,
+            digest=b"sha256:" + b"4" * 64,
+            size=len(original_data),
+            filter_applied=CompressFilter(
+                resource_id=202,  # compressed resource id
+                compression_alg="zstd",
+            ),
+        )
+
+        save_dst = tmp_path / "output_from_slices.bin"
+        dctx = zstandard.ZstdDecompressor()
+
+        recreate_zstd_compressed_resource_from_slices(entry, slices, save_dst, dctx)
+
+        assert save_dst.read_bytes() == original_data
+        # no intermediate file is left
+        assert sorted(tmp_path.iterdir()) == sorted([*slices, save_dst])
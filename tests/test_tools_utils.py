@@ -0,0 +1,205 @@
+# Copyright 2025 TIER IV, INC. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from ota_image_tools._utils import (
+    BoundedWorkerPool,
+    InflightBytesLimiter,
+    iter_in_background,
+)
+
+
+class TestBoundedWorkerPool:
+    def test_all_tasks_are_executed(self):
+        """Test that all submitted tasks are executed before the pool exits."""
+        _lock = threading.Lock()
+        results: list[int] = []
+
+        def _task(_idx: int) -> None:
+            with _lock:
+                results.append(_idx)
+
+        with BoundedWorkerPool(max_workers=4, max_pending=2) as pool:
+            for _idx in range(100):
+                pool.submit(_task, _idx)
+
+        assert sorted(results) == list(range(100))
+        assert pool.last_exc is None
+
+    def test_task_exception_is_captured(self):
+        """Test that exception raised from a task is exposed by last_exc."""
+        exc = ValueError("injected test failure")
+
+        def _task() -> None:
+            raise exc
+
+        with BoundedWorkerPool(max_workers=2, max_pending=2) as pool:
+            pool.submit(_task)
+
+        assert pool.last_exc is exc
+
+    def test_initializer_runs_at_each_worker(self):
+        """Test that initializer is called once at each worker thread."""
+        _thread_local = threading.local()
+        _initialized: list[str] = []
+        _lock = threading.Lock()
+
+        def _initializer() -> None:
+            _thread_local.initialized = True
+            with _lock:
+                _initialized.append(threading.current_thread().name)
+
+        def _task() -> None:
+            assert _thread_local.initialized
+
+        with BoundedWorkerPool(
+            max_workers=3,
+            max_pending=4,
+            initializer=_initializer,
+            thread_name_prefix="test_worker",
+        ) as pool:
+            for _ in range(10):
+                pool.submit(_task)
+
+        assert pool.last_exc is None
+        assert len(_initialized) == 3
+        assert all(_name.startswith("test_worker") for _name in _initialized)
+
+    def test_finalizer_runs_at_each_worker(self):
+        """Test that finalizer is called once at each worker thread on exit."""
+        _finalized: list[str] = []
+        _lock = threading.Lock()
+
+        def _finalizer() -> None:
+            with _lock:
+                _finalized.append(threading.current_thread().name)
+
+        with BoundedWorkerPool(
+            max_workers=3, max_pending=4, finalizer=_finalizer
+        ) as pool:
+            for _ in range(10):
+                pool.submit(lambda: None)
+
+        assert pool.last_exc is None
+        assert len(set(_finalized)) == len(_finalized) == 3
+
+    def test_initializer_failure_drops_tasks(self):
+        """Test that failed initializer doesn't block the dispatcher."""
+        exc = RuntimeError("initializer failed")
+        executed: list[int] = []
+
+        def _initializer() -> None:
+            raise exc
+
+        with BoundedWorkerPool(
+            max_workers=2, max_pending=1, initializer=_initializer
+        ) as pool:
+            for _idx in range(10):
+                pool.submit(executed.append, _idx)
+
+        assert pool.last_exc is exc
+        assert not executed
+
+
+class TestIterInBackground:
+    @pytest.mark.parametrize("batch_size", (1, 3, 100, 1000))
+    def test_all_items_in_order(self, batch_size):
+        """Test that all items are yielded in order."""
+        result = list(
+            iter_in_background(range(100), max_pending=2, batch_size=batch_size)
+        )
+        assert result == list(range(100))
+
+    def test_producer_runs_in_background_thread(self):
+        """Test that the iterable is consumed in the named producer thread."""
+        _caller = threading.current_thread().name
+
+        def _gen():
+            for _idx in range(10):
+                yield threading.current_thread().name, _idx
+
+        for _thread_name, _ in iter_in_background(
+            _gen(), max_pending=1, thread_name="test_producer"
+        ):
+            assert _thread_name == "test_producer"
+            assert _thread_name != _caller
+
+    def test_producer_exception_is_reraised(self):
+        """Test that exception raised by the producer is re-raised at caller."""
+
+        def _gen():
+            yield 1
+            raise ValueError("injected test failure")
+
+        with pytest.raises(ValueError):
+            list(iter_in_background(_gen(), max_pending=1))
+
+    def test_caller_stops_early(self):
+        """Test that stopping early doesn't block, and the source is closed."""
+        _closed = threading.Event()
+
+        def _gen():
+            try:
+                yield from range(10_000)
+            finally:
+                _closed.set()
+
+        _it = iter_in_background(_gen(), max_pending=1, batch_size=2)
+        for _item in _it:
+            if _item >= 10:
+                break
+        _it.close()
+        assert _closed.is_set()
+
+
+class TestInflightBytesLimiter:
+    @pytest.mark.parametrize(
+        "size, expected_tokens",
+        (
+            (0, 16),  # min_cost
+            (100, 100),
+            (4096, 1024),  # capped at max_bytes
+        ),
+    )
+    def test_acquire_tokens(self, size, expected_tokens):
+        """Test the reserved tokens are clamped between min_cost and max_bytes."""
+        limiter = InflightBytesLimiter(1024, min_cost=16)
+        assert (_tokens := limiter.acquire(size)) == expected_tokens
+        assert limiter.inflight == expected_tokens
+        limiter.release(_tokens)
+        assert limiter.inflight == 0
+
+    def test_acquire_blocks_until_released(self):
+        """Test that acquire blocks when the budget is used up."""
+        limiter = InflightBytesLimiter(1024)
+        _tokens = limiter.acquire(1000)
+        _acquired = threading.Event()
+
+        def _acquire() -> None:
+            limiter.acquire(100)
+            _acquired.set()
+
+        _t = threading.Thread(target=_acquire, daemon=True)
+        _t.start()
+        assert not _acquired.wait(0.1)
+
+        limiter.release(_tokens)
+        assert _acquired.wait(5)
+        _t.join()
+        assert limiter.inflight == 100
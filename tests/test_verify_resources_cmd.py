@@ -0,0 +1,56 @@
+# Copyright 2025 TIER IV, INC. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Tests for verify_resources command module."""
+
+from __future__ import annotations
+
+import argparse
+
+from pytest_mock import MockerFixture
+
+from ota_image_tools.cmds.verify_resources import verify_resources_cmd
+
+VERIFY_RESOURCES = "ota_image_tools.cmds.verify_resources"
+
+
+def _run_cmd(mocker: MockerFixture, blob_checksum: list[str] | None):
+    mocker.patch(f"{VERIFY_RESOURCES}.check_if_valid_ota_image", return_value=True)
+    load_sizes_mock = mocker.patch(
+        f"{VERIFY_RESOURCES}._load_expected_blobs_size", return_value={}
+    )
+    helper_mock = mocker.patch(f"{VERIFY_RESOURCES}.FileDigestHelper")
+    verify_resources_cmd(
+        argparse.Namespace(
+            image_root="some_path", blob_checksum=blob_checksum, worker_threads=1
+        )
+    )
+    return load_sizes_mock, helper_mock
+
+
+def test_verify_all_blobs_with_size_precheck(mocker: MockerFixture):
+    """Test that the expected blobs size is loaded for verifying the whole storage."""
+    load_sizes_mock, helper_mock = _run_cmd(mocker, None)
+    load_sizes_mock.assert_called_once()
+    assert (
+        helper_mock.call_args.kwargs["expected_sizes"] is load_sizes_mock.return_value
+    )
+
+
+def test_verify_specified_blobs_without_size_precheck(mocker: MockerFixture):
+    """Test that the resource_table is not loaded for verifying specified blobs."""
+    load_sizes_mock, helper_mock = _run_cmd(mocker, ["sha256:" + "a" * 64])
+    load_sizes_mock.assert_not_called()
+    assert helper_mock.call_args.kwargs["expected_sizes"] is None
+    (_blobs,) = helper_mock.return_value.digest_files.call_args.args
+    assert list(_blobs) == ["a" * 64]
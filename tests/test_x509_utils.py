@@ -129,6 +129,21 @@ class TestCACertStore:
 
         assert cert.subject in store
 
+    def test_add_raw_certs(self, root_ca_cert, intermediate_ca_cert):
+        """Test adding concatenated raw PEM certificates to store."""
+        root_cert, _ = root_ca_cert
+        interm_cert, _ = intermediate_ca_cert
+        pem_bytes = b"\n".join(
+            _cert.public_bytes(serialization.Encoding.PEM)
+            for _cert in (root_cert, interm_cert)
+        )
+
+        store = CACertStore()
+        store.add_raw_certs(pem_bytes)
+
+        assert root_cert.subject in store
+        assert interm_cert.subject in store
+
     def test_internal_check_valid_store(self, root_ca_cert):
         """Test internal check with valid store containing root cert."""
         cert, _ = root_ca_cert